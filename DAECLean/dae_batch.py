@@ -0,0 +1,307 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Project Name:        DAE Clean
+# License:             GPL
+# Authors:             Daniel Norris, DN Drawings
+
+"""Cleans many .dae files with a pool of background Blender processes.
+
+Driver, run with any Python 3:
+
+    python dae_batch.py models/ "exports/**/*.dae" --preset preset.json \\
+        --out cleaned/ --format glb --jobs 4
+
+Each file is handled by a worker, which is this same script run inside
+Blender:
+
+    blender -b --factory-startup -P dae_batch.py -- --worker \\
+        --input model.dae --output model.blend --preset preset.json \\
+        --result model.json
+
+A preset is a JSON or TOML table of DCSettings fields, e.g.
+{"dc_tri_quad_bool": true, "dc_rem_d_tol_float": 0.001}.
+"""
+
+import argparse
+import glob
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    import bpy  # type: ignore
+except ImportError:
+    bpy = None
+
+
+OUTPUT_FORMATS = ("blend", "glb")
+
+
+def load_preset(path):
+    if not path:
+        return {}
+    if path.endswith(".toml"):
+        import tomllib
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    with open(path) as f:
+        return json.load(f)
+
+
+#############################################
+# WORKER (inside Blender)
+############################################
+class BatchReport:
+    """Stands in for the operator so clean_DAE can report in the background"""
+
+    def __init__(self):
+        self.messages = []
+
+    def report(self, type, message):
+        self.messages.append(message)
+
+
+def load_addon():
+    """Imports and registers the add-on package this script lives in"""
+    addon_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, os.path.dirname(addon_dir))
+    addon = importlib.import_module(os.path.basename(addon_dir))
+    if not hasattr(bpy.types.Scene, "dc_settings"):
+        addon.register()
+    return addon.DAEClean
+
+
+def apply_preset(settings, preset):
+    for key, value in preset.items():
+        if key not in settings.bl_rna.properties:
+            raise ValueError("Unknown DCSettings field: %s" % key)
+        setattr(settings, key, value)
+
+
+def mesh_vertex_count(objects):
+    return sum(len(m.vertices) for m in set(o.data for o in objects if o.type == "MESH"))
+
+
+def clean_file(dae_clean, path, output, preset, preclean=False):
+    """Imports path into the current, empty scene, cleans it and saves output.
+    Returns a result dict for the driver"""
+    context = bpy.context
+    result = {"input": path, "output": output}
+
+    start = time.perf_counter()
+    if path.endswith(".blend"):
+        bpy.ops.wm.open_mainfile(filepath=path)
+        context = bpy.context
+    elif preclean:
+        dae_preclean = importlib.import_module(dae_clean.__package__ + ".dae_preclean")
+        slim_path = os.path.splitext(output)[0] + ".preclean.dae"
+        try:
+            result["preclean"] = dae_preclean.preclean_file(
+                path, slim_path, remove_cameras=preset.get("dc_camera_del_bool", True))
+            bpy.ops.wm.collada_import(filepath=slim_path)
+        finally:
+            os.remove(slim_path)
+    else:
+        bpy.ops.wm.collada_import(filepath=path)
+    result["import_time"] = time.perf_counter() - start
+
+    apply_preset(context.scene.dc_settings, preset)
+
+    for obj in context.scene.objects:
+        obj.select_set(True)
+    result["verts_before"] = mesh_vertex_count(context.scene.objects)
+
+    start = time.perf_counter()
+    report = BatchReport()
+    dae_clean.clean_DAE(report, context)
+    result["clean_time"] = time.perf_counter() - start
+    result["verts_after"] = mesh_vertex_count(context.scene.objects)
+    result["messages"] = report.messages
+
+    start = time.perf_counter()
+    if output.endswith(".glb"):
+        bpy.ops.export_scene.gltf(filepath=output, export_format="GLB")
+    else:
+        bpy.ops.wm.save_as_mainfile(filepath=output, compress=True)
+    result["save_time"] = time.perf_counter() - start
+
+    return result
+
+
+def worker_main(argv):
+    parser = argparse.ArgumentParser(prog="dae_batch.py --worker")
+    parser.add_argument("--worker", action="store_true")
+    parser.add_argument("--input", required=True)
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--preset", default="")
+    parser.add_argument("--result", required=True)
+    parser.add_argument("--preclean", action="store_true")
+    args = parser.parse_args(argv)
+
+    bpy.ops.wm.read_homefile(use_empty=True)
+    dae_clean = load_addon()
+
+    try:
+        result = clean_file(dae_clean, args.input, args.output,
+                            load_preset(args.preset), args.preclean)
+        result["ok"] = True
+    except Exception as e:
+        result = {"input": args.input, "ok": False, "error": str(e)}
+
+    with open(args.result, "w") as f:
+        json.dump(result, f)
+
+
+#############################################
+# DRIVER
+############################################
+def collect_files(patterns):
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "**", "*.dae")
+        files.extend(sorted(glob.glob(pattern, recursive=True)))
+    # keep order but drop repeats from overlapping patterns
+    return list(dict.fromkeys(os.path.abspath(f) for f in files))
+
+
+def run_worker(blender, path, output, preset, timeout, preclean=False):
+    """Cleans one file in a new background Blender process"""
+    with tempfile.TemporaryDirectory() as tmp:
+        result_path = os.path.join(tmp, "result.json")
+        cmd = [
+            blender, "-b", "--factory-startup", "-P", os.path.abspath(__file__),
+            "--", "--worker",
+            "--input", path, "--output", output, "--result", result_path,
+        ]
+        if preset:
+            cmd += ["--preset", os.path.abspath(preset)]
+        if preclean:
+            cmd.append("--preclean")
+
+        start = time.perf_counter()
+        try:
+            proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return {"input": path, "ok": False, "error": "timed out"}
+        wall_time = time.perf_counter() - start
+
+        if not os.path.exists(result_path):
+            return {"input": path, "ok": False,
+                    "error": "Blender exited with %s: %s" % (
+                        proc.returncode, proc.stderr.strip()[-500:])}
+        with open(result_path) as f:
+            result = json.load(f)
+        result["wall_time"] = wall_time
+        return result
+
+
+def format_result(result):
+    name = os.path.basename(result["input"])
+    if not result.get("ok"):
+        return "%-40s FAILED %s" % (name, result.get("error", ""))
+    before = result["verts_before"]
+    after = result["verts_after"]
+    reduction = 100.0 * (before - after) / before if before else 0.0
+    return "%-40s %7.2fs (clean %6.2fs)  verts %9d -> %9d  (-%.1f%%)" % (
+        name, result["wall_time"], result["clean_time"], before, after, reduction)
+
+
+def output_paths(files, out_dir, fmt):
+    """Output path of each file, keeping its folder relative to the folder all
+    files share so a/model.dae and b/model.dae do not overwrite each other"""
+    if not files:
+        return {}
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(f)) for f in files])
+    outputs = {}
+    for path in files:
+        relative = os.path.relpath(os.path.splitext(os.path.abspath(path))[0], root)
+        outputs[path] = os.path.join(os.path.abspath(out_dir), "%s.%s" % (relative, fmt))
+    return outputs
+
+
+def run_batch(files, out_dir, preset, fmt, jobs, blender, timeout=None,
+              preclean=False, log=print):
+    """Spreads files over jobs background Blender processes.
+    Returns the list of result dicts in completion order"""
+    os.makedirs(out_dir, exist_ok=True)
+    results = []
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = []
+        for path, output in output_paths(files, out_dir, fmt).items():
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+            futures.append(pool.submit(
+                run_worker, blender, path, output, preset, timeout, preclean))
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            log(format_result(result))
+    return results
+
+
+def driver_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="dae_batch.py", description="Clean many .dae files with background Blender")
+    parser.add_argument("inputs", nargs="+", help=".dae files, directories or glob patterns")
+    parser.add_argument("--out", required=True, help="output directory")
+    parser.add_argument("--preset", default="", help="JSON or TOML file of DCSettings fields")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="blend")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--blender", default=os.environ.get("BLENDER", "blender"))
+    parser.add_argument("--timeout", type=float, default=None, help="seconds per file")
+    parser.add_argument("--report", default="", help="write all results to this JSON file")
+    parser.add_argument("--preclean", action="store_true",
+                        help="slim each file with dae_preclean.py before importing it")
+    args = parser.parse_args(argv)
+
+    # fail on a bad preset before starting any Blender processes
+    load_preset(args.preset)
+
+    files = collect_files(args.inputs)
+    if not files:
+        print("No .dae files found")
+        return 1
+
+    start = time.perf_counter()
+    results = run_batch(files, args.out, args.preset, args.format,
+                        max(args.jobs, 1), args.blender, args.timeout, args.preclean)
+    failed = [r for r in results if not r.get("ok")]
+    before = sum(r["verts_before"] for r in results if r.get("ok"))
+    after = sum(r["verts_after"] for r in results if r.get("ok"))
+    print("%s files in %.1fs, %s failed, verts %s -> %s" % (
+        len(results), time.perf_counter() - start, len(failed), before, after))
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(results, f, indent=2)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    if bpy is not None and "--worker" in sys.argv:
+        worker_main(sys.argv[sys.argv.index("--") + 1:])
+    else:
+        sys.exit(driver_main(sys.argv[1:]))
@@ -0,0 +1,253 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Project Name:        DAE Clean
+# License:             GPL
+# Authors:             Daniel Norris, DN Drawings
+
+"""Keeps background Blender processes running to clean .dae files dropped
+into a folder, so Blender startup is paid once per worker, not per file.
+
+Driver, run with any Python 3:
+
+    python dae_daemon.py drop/ --out cleaned/ --preset preset.json --workers 4
+
+Each worker is this same script run inside Blender. Workers claim a file by
+renaming it into drop/processing/, so any number of them can share a
+folder. The cleaned file and a <name>.json result go to --out, the .dae is
+then moved to drop/done/ or drop/failed/. A file that crashes Blender is
+retried on a new worker up to --max-attempts times.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+try:
+    import bpy  # type: ignore
+except ImportError:
+    bpy = None
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import dae_batch  # noqa: E402
+
+
+#############################################
+# WORKER (inside Blender)
+############################################
+def claim_job(drop_dir, settle):
+    """Moves the oldest .dae in drop_dir that has not changed for settle
+    seconds into drop_dir/processing. Returns its new path or None"""
+    now = time.time()
+    candidates = []
+    for entry in os.scandir(drop_dir):
+        if not entry.is_file() or not entry.name.lower().endswith(".dae"):
+            continue
+        try:
+            mtime = entry.stat().st_mtime
+        except FileNotFoundError:
+            continue
+        # still being copied in
+        if now - mtime < settle:
+            continue
+        candidates.append((mtime, entry.name))
+
+    processing = os.path.join(drop_dir, "processing")
+    for _mtime, name in sorted(candidates):
+        claimed = os.path.join(processing, "%s.%s%s" % (
+            os.path.splitext(name)[0], os.getpid(), os.path.splitext(name)[1]))
+        try:
+            os.rename(os.path.join(drop_dir, name), claimed)
+        except FileNotFoundError:
+            # another worker got it first
+            continue
+        return claimed
+    return None
+
+
+def claimed_name(claimed):
+    """Original file name of a claimed file, and the pid of its worker"""
+    stem, ext = os.path.splitext(os.path.basename(claimed))
+    stem, pid = os.path.splitext(stem)
+    return stem + ext, pid[1:]
+
+
+def finish_job(drop_dir, claimed, name, ok):
+    folder = os.path.join(drop_dir, "done" if ok else "failed")
+    os.replace(claimed, os.path.join(folder, name))
+
+
+def run_job(claimed, name, out_dir, preset, fmt, preclean):
+    """Cleans one claimed file in a fresh empty scene"""
+    bpy.ops.wm.read_homefile(use_empty=True)
+    dae_clean = dae_batch.load_addon()
+
+    stem = os.path.splitext(name)[0]
+    output = os.path.join(out_dir, "%s.%s" % (stem, fmt))
+    start = time.perf_counter()
+    try:
+        result = dae_batch.clean_file(dae_clean, claimed, output, preset, preclean)
+        result["ok"] = True
+    except Exception as e:
+        result = {"ok": False, "error": str(e)}
+    result["input"] = name
+    result["worker"] = os.getpid()
+    result["wall_time"] = time.perf_counter() - start
+
+    with open(os.path.join(out_dir, stem + ".json"), "w") as f:
+        json.dump(result, f, indent=2)
+    return result
+
+
+def worker_main(argv):
+    parser = argparse.ArgumentParser(prog="dae_daemon.py --worker")
+    parser.add_argument("--worker", action="store_true")
+    parser.add_argument("--drop", required=True)
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--preset", default="")
+    parser.add_argument("--format", choices=dae_batch.OUTPUT_FORMATS, default="blend")
+    parser.add_argument("--preclean", action="store_true")
+    parser.add_argument("--poll", type=float, default=1.0)
+    parser.add_argument("--settle", type=float, default=2.0)
+    parser.add_argument("--max-jobs", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    preset = dae_batch.load_preset(args.preset)
+    dae_batch.load_addon()
+
+    jobs = 0
+    while not args.max_jobs or jobs < args.max_jobs:
+        claimed = claim_job(args.drop, args.settle)
+        if claimed is None:
+            time.sleep(args.poll)
+            continue
+
+        name, _pid = claimed_name(claimed)
+        result = run_job(claimed, name, args.out, preset, args.format, args.preclean)
+        finish_job(args.drop, claimed, name, result["ok"])
+        print(dae_batch.format_result(result), flush=True)
+        jobs += 1
+
+
+#############################################
+# DRIVER
+############################################
+def start_worker(blender, args):
+    cmd = [
+        blender, "-b", "--factory-startup", "-P", os.path.abspath(__file__),
+        "--", "--worker",
+        "--drop", os.path.abspath(args.drop), "--out", os.path.abspath(args.out),
+        "--format", args.format,
+        "--poll", str(args.poll), "--settle", str(args.settle),
+        "--max-jobs", str(args.max_jobs),
+    ]
+    if args.preset:
+        cmd += ["--preset", os.path.abspath(args.preset)]
+    if args.preclean:
+        cmd.append("--preclean")
+    return subprocess.Popen(cmd)
+
+
+def recover_claims(drop_dir, out_dir, max_attempts, pid=None):
+    """Puts files claimed by workers that died mid-job back in the queue.
+    A file that has taken down a worker max_attempts times goes to failed/
+    instead, with a result saying so. Attempts are kept in
+    drop_dir/attempts.json, only the driver writes it"""
+    attempts_path = os.path.join(drop_dir, "attempts.json")
+    attempts = {}
+    if os.path.exists(attempts_path):
+        with open(attempts_path) as f:
+            attempts = json.load(f)
+
+    processing = os.path.join(drop_dir, "processing")
+    for entry in os.listdir(processing):
+        name, claimed_by = claimed_name(entry)
+        if pid is not None and claimed_by != str(pid):
+            continue
+        attempts[name] = attempts.get(name, 0) + 1
+        if attempts[name] < max_attempts:
+            os.replace(os.path.join(processing, entry), os.path.join(drop_dir, name))
+            continue
+
+        finish_job(drop_dir, os.path.join(processing, entry), name, False)
+        result = {"input": name, "ok": False,
+                  "error": "worker exited while cleaning it %s times" % attempts.pop(name)}
+        with open(os.path.join(out_dir, os.path.splitext(name)[0] + ".json"), "w") as f:
+            json.dump(result, f, indent=2)
+        print(dae_batch.format_result(result), flush=True)
+
+    with open(attempts_path, "w") as f:
+        json.dump(attempts, f)
+
+
+def driver_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="dae_daemon.py", description="Clean .dae files dropped into a folder")
+    parser.add_argument("drop", help="folder to watch for .dae files")
+    parser.add_argument("--out", required=True, help="output directory")
+    parser.add_argument("--preset", default="", help="JSON or TOML file of DCSettings fields")
+    parser.add_argument("--format", choices=dae_batch.OUTPUT_FORMATS, default="blend")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--blender", default=os.environ.get("BLENDER", "blender"))
+    parser.add_argument("--preclean", action="store_true",
+                        help="slim each file with dae_preclean.py before importing it")
+    parser.add_argument("--poll", type=float, default=1.0, help="seconds between folder scans")
+    parser.add_argument("--settle", type=float, default=2.0,
+                        help="seconds a file must be unchanged before it is picked up")
+    parser.add_argument("--max-jobs", type=int, default=0,
+                        help="restart a worker after this many files, 0 never restarts")
+    parser.add_argument("--max-attempts", type=int, default=3,
+                        help="move a file to failed/ after it took down this many workers")
+    args = parser.parse_args(argv)
+
+    # fail on a bad preset before starting any Blender processes
+    dae_batch.load_preset(args.preset)
+
+    for folder in ("processing", "done", "failed"):
+        os.makedirs(os.path.join(args.drop, folder), exist_ok=True)
+    os.makedirs(args.out, exist_ok=True)
+    recover_claims(args.drop, args.out, args.max_attempts)
+
+    workers = [start_worker(args.blender, args) for _i in range(max(args.workers, 1))]
+    print("%s workers watching %s" % (len(workers), os.path.abspath(args.drop)))
+    try:
+        while True:
+            time.sleep(args.poll)
+            for i, proc in enumerate(workers):
+                if proc.poll() is not None:
+                    # recycled after --max-jobs, or crashed
+                    recover_claims(args.drop, args.out, args.max_attempts, proc.pid)
+                    workers[i] = start_worker(args.blender, args)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for proc in workers:
+            proc.terminate()
+        for proc in workers:
+            proc.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    if bpy is not None and "--worker" in sys.argv:
+        worker_main(sys.argv[sys.argv.index("--") + 1:])
+    else:
+        sys.exit(driver_main(sys.argv[1:]))
@@ -0,0 +1,289 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Project Name:        DAE Clean
+# License:             GPL
+# Authors:             Daniel Norris, DN Drawings
+
+"""Streaming COLLADA pre-cleaner, runs with or without Blender.
+
+    python dae_preclean.py model.dae model_slim.dae
+
+The file is read with iterparse and every child of a library element
+(a <geometry>, <camera>, <visual_scene>...) is processed and written out
+as soon as it is complete. Memory use is bounded by the largest of those
+elements, not the file size.
+
+- duplicate positions in each mesh's POSITION <float_array> are welded and
+  the VERTEX indices of every primitive are remapped
+- <camera> elements and the scene nodes instancing them are dropped
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import xml.etree.ElementTree as ET
+
+from xml.sax.saxutils import escape, quoteattr
+
+
+COLLADA_NS = "http://www.collada.org/2005/11/COLLADASchema"
+
+# elements at this depth are processed and written out whole,
+# COLLADA > library_geometries > geometry
+FLUSH_DEPTH = 2
+
+
+def q(tag):
+    return "{%s}%s" % (COLLADA_NS, tag)
+
+
+#############################################
+# ELEMENT CLEANING
+############################################
+def weld_geometry(geometry, tolerance):
+    """Welds duplicate positions of a <geometry>, returns the number removed.
+    With tolerance 0 only exact duplicates are welded, otherwise positions are
+    snapped to a grid tolerance wide.
+    Other per vertex inputs (SketchUp puts NORMAL there) are moved onto the
+    primitives, indexed by the original vertex, so they survive the weld"""
+    mesh = geometry.find(q("mesh"))
+    if mesh is None:
+        return 0
+
+    vertices = mesh.find(q("vertices"))
+    if vertices is None:
+        return 0
+    inputs = vertices.findall(q("input"))
+    positions = [i for i in inputs if i.get("semantic") == "POSITION"]
+    if len(positions) != 1:
+        return 0
+    extra_inputs = [i for i in inputs if i is not positions[0]]
+
+    sources = {s.get("id"): s for s in mesh.findall(q("source"))}
+    source = sources.get(positions[0].get("source", "").lstrip("#"))
+    if source is None:
+        return 0
+    float_array = source.find(q("float_array"))
+    accessor = source.find(q("technique_common") + "/" + q("accessor"))
+    if float_array is None or accessor is None or not float_array.text:
+        return 0
+
+    stride = int(accessor.get("stride", 3))
+    count = int(accessor.get("count", 0))
+    values = float_array.text.split()
+
+    index = {}
+    remap = []
+    welded_values = []
+    for i in range(count):
+        position = values[i * stride:(i + 1) * stride]
+        if tolerance > 0:
+            key = tuple(round(float(v) / tolerance) for v in position)
+        else:
+            key = tuple(float(v) for v in position)
+        j = index.get(key)
+        if j is None:
+            j = index[key] = len(index)
+            welded_values.extend(position)
+        remap.append(j)
+
+    removed = count - len(index)
+    if not removed:
+        return 0
+
+    float_array.text = " ".join(welded_values)
+    float_array.set("count", str(len(welded_values)))
+    accessor.set("count", str(len(index)))
+
+    vertices_ref = "#" + vertices.get("id", "")
+    for primitive in mesh:
+        prim_inputs = primitive.findall(q("input"))
+        vertex_inputs = [i for i in prim_inputs
+                         if i.get("semantic") == "VERTEX" and i.get("source") == vertices_ref]
+        if not vertex_inputs:
+            continue
+        offset = int(vertex_inputs[0].get("offset", 0))
+        n_offsets = max(int(i.get("offset", 0)) for i in prim_inputs) + 1
+
+        # the moved inputs get new offsets after the existing ones
+        insert_at = list(primitive).index(prim_inputs[-1]) + 1
+        for k, extra in enumerate(extra_inputs):
+            moved = ET.Element(q("input"), dict(extra.attrib))
+            moved.set("offset", str(n_offsets + k))
+            moved.tail = prim_inputs[-1].tail
+            primitive.insert(insert_at + k, moved)
+
+        # <polygons> may also hold <ph><p> holes, so search the whole tree
+        for p in primitive.iter(q("p")):
+            if not p.text:
+                continue
+            indices = p.text.split()
+            new_indices = []
+            for k in range(0, len(indices), n_offsets):
+                group = indices[k:k + n_offsets]
+                original = group[offset]
+                group[offset] = str(remap[int(original)])
+                new_indices.extend(group)
+                new_indices.extend([original] * len(extra_inputs))
+            p.text = " ".join(new_indices)
+
+    for extra in extra_inputs:
+        vertices.remove(extra)
+
+    return removed
+
+
+def remove_camera_nodes(parent):
+    """Drops camera instances from the scene graph below parent, along with
+    nodes left empty. Returns the number of nodes removed"""
+    removed = 0
+    for node in list(parent.findall(q("node"))):
+        removed += remove_camera_nodes(node)
+        cameras = node.findall(q("instance_camera"))
+        if not cameras:
+            continue
+        for camera in cameras:
+            node.remove(camera)
+        if not any(child.tag == q("node") or child.tag.startswith(q("instance_"))
+                   for child in node):
+            parent.remove(node)
+            removed += 1
+    return removed
+
+
+def clean_element(elem, stats, weld_tolerance, remove_cameras):
+    """Cleans a complete element, returns False if it should be dropped"""
+    if elem.tag == q("geometry"):
+        stats["positions_welded"] += weld_geometry(elem, weld_tolerance)
+    elif elem.tag == q("camera") and remove_cameras:
+        stats["cameras_removed"] += 1
+        return False
+    elif elem.tag == q("visual_scene") and remove_cameras:
+        stats["camera_nodes_removed"] += remove_camera_nodes(elem)
+    return True
+
+
+#############################################
+# STREAMING
+############################################
+def is_library(elem):
+    return elem.tag.startswith(q("library_"))
+
+
+def qualified_name(name, prefixes):
+    if name[0] != "{":
+        return name
+    uri, local = name[1:].split("}", 1)
+    prefix = prefixes.get(uri, "")
+    return "%s:%s" % (prefix, local) if prefix else local
+
+
+def start_tag(elem, prefixes, ns_decls):
+    parts = [qualified_name(elem.tag, prefixes)]
+    for prefix, uri in ns_decls:
+        parts.append("%s=%s" % ("xmlns:" + prefix if prefix else "xmlns", quoteattr(uri)))
+    for key, value in elem.attrib.items():
+        parts.append("%s=%s" % (qualified_name(key, prefixes), quoteattr(value)))
+    return "<%s>" % " ".join(parts)
+
+
+def preclean_file(src_path, dst_path, weld_tolerance=0.0, remove_cameras=True):
+    """Writes a slimmer copy of src_path to dst_path, returns stats"""
+    stats = {
+        "positions_welded": 0,
+        "cameras_removed": 0,
+        "camera_nodes_removed": 0,
+    }
+    start = time.perf_counter()
+
+    prefixes = {}
+    ns_decls = []
+    ancestors = []
+    # library start tag held back until it has a child left to write, an
+    # empty <library_cameras/> is not valid COLLADA
+    pending = None
+
+    with open(dst_path, "w", encoding="utf-8") as out:
+        out.write('<?xml version="1.0" encoding="utf-8"?>\n')
+        for event, item in ET.iterparse(src_path, events=("start-ns", "start", "end")):
+            if event == "start-ns":
+                prefix, uri = item
+                prefixes.setdefault(uri, prefix)
+                ET.register_namespace(prefix, uri)
+                ns_decls.append(item)
+                continue
+
+            if event == "start":
+                if len(ancestors) == FLUSH_DEPTH - 1 and is_library(item):
+                    pending = start_tag(item, prefixes, ns_decls) + "\n"
+                elif len(ancestors) < FLUSH_DEPTH:
+                    out.write(start_tag(item, prefixes, ns_decls) + "\n")
+                ns_decls = []
+                ancestors.append(item)
+                continue
+
+            ancestors.pop()
+            depth = len(ancestors)
+            if depth == FLUSH_DEPTH - 1 and is_library(item) and pending is not None:
+                # every child was dropped, leave the library out
+                pending = None
+            elif depth < FLUSH_DEPTH:
+                if item.text and item.text.strip() and not len(item):
+                    out.write(escape(item.text))
+                out.write("</%s>\n" % qualified_name(item.tag, prefixes))
+            elif depth == FLUSH_DEPTH:
+                if clean_element(item, stats, weld_tolerance, remove_cameras):
+                    if pending is not None:
+                        out.write(pending)
+                        pending = None
+                    item.tail = "\n"
+                    out.write(ET.tostring(item, encoding="unicode"))
+                # free the finished element, the parent would keep it alive
+                ancestors[-1].remove(item)
+
+    stats["time"] = time.perf_counter() - start
+    stats["input_bytes"] = os.path.getsize(src_path)
+    stats["output_bytes"] = os.path.getsize(dst_path)
+    return stats
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        prog="dae_preclean.py", description="Slim down a .dae file before importing it")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--weld-tolerance", type=float, default=0.0,
+                        help="grid size for welding positions, 0 welds exact duplicates only")
+    parser.add_argument("--keep-cameras", action="store_true")
+    args = parser.parse_args(argv)
+
+    stats = preclean_file(args.input, args.output, args.weld_tolerance,
+                          not args.keep_cameras)
+    print("Welded %s positions, removed %s cameras and %s camera nodes, "
+          "%s -> %s bytes in %.2fs" % (
+              stats["positions_welded"], stats["cameras_removed"],
+              stats["camera_nodes_removed"], stats["input_bytes"],
+              stats["output_bytes"], stats["time"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -20,10 +20,26 @@
 # License:             GPL
 # Authors:             Daniel Norris, DN Drawings
 
+import cProfile
+import fnmatch
+import hashlib
+import heapq
+import importlib
+import json
+import os
+import tempfile
+import time
+
+from contextlib import contextmanager
+from math import radians
+
 import bpy  # type: ignore
 import bmesh  # type: ignore
+import numpy as np
 
-from bpy.props import BoolProperty, FloatProperty  # type: ignore
+from bpy.props import BoolProperty, EnumProperty, FloatProperty, IntProperty, StringProperty  # type: ignore
+from bpy_extras.io_utils import ImportHelper  # type: ignore
+from mathutils import Matrix  # type: ignore
 
 
 l_disolve_setting = {
@@ -41,54 +57,92 @@ def return_l_dissolve_setting(dissolve_by_material: bool):
 # decorator
 def change_mouse_cursor(func):
     def change_cursor(*args):
-        bpy.context.window.cursor_modal_set("WAIT")
-        func(*args)
-        bpy.context.window.cursor_modal_set("DEFAULT")
+        # there is no window when running in the background
+        if bpy.context.window:
+            bpy.context.window.cursor_modal_set("WAIT")
+        result = func(*args)
+        if bpy.context.window:
+            bpy.context.window.cursor_modal_set("DEFAULT")
+        return result
 
     return change_cursor
 
 
-def clean_up():
-    bpy.context.window.cursor_modal_set("DEFAULT")
+def sibling_module(name):
+    """Imports a module shipped in the add-on package next to this one.
+    None when it is missing, e.g. DAEClean.py was installed on its own"""
+    if not __package__:
+        return None
+    try:
+        return importlib.import_module(__package__ + "." + name)
+    except ImportError:
+        return None
 
 
-def join_loose_faces(context, selected):
-    rem_list = []
+def clean_up():
+    if bpy.context.window:
+        bpy.context.window.cursor_modal_set("DEFAULT")
+
 
-    i = -1
-    max_i = len(selected)
-    while i < max_i:
-        i += 1
+def finish_steps(steps):
+    """Runs a step generator to the end, returns its return value"""
+    while True:
         try:
-            obj = bpy.context.scene.objects[selected[i]]
-            rem_list = traverse_groups(context, [c.name for c in obj.children])
-            selected = [x for x in selected if x not in rem_list]
-        except:
-            continue
+            next(steps)
+        except StopIteration as e:
+            return e.value
 
-    return selection_by_name(selected)
 
+def join_loose_faces(context, selected, direct=False):
+    return finish_steps(join_loose_faces_steps(context, selected, direct))
 
-def traverse_groups(context, selected):
-    rem_list = []
-    obj_store = []
-    objs = []
 
-    for obj_n in selected:
-        # make sure item is not already assigned to the obj_store
-        if obj_n in (item for sublist in obj_store for item in sublist):
+def join_loose_faces_steps(context, selected, direct=False):
+    """Generator version of join_loose_faces, yields after each group is
+    joined and returns the objects left to clean"""
+    rem_set = set()
+
+    for name in selected:
+        if name in rem_set:
+            continue
+        obj = context.scene.objects.get(name)
+        if obj is None:
             continue
-        s_o = obj_n
-        if obj_n.find(".") != -1:
-            s_o = obj_n.split(".")[0]
-
-        objs = [o for o in selected if o.find(s_o + ".") != -1 and
-                o != obj_n and
-                o not in (item for sublist in obj_store for item in sublist)
-                ]
-        if objs:
-            objs.append(obj_n)
-            obj_store.append(objs)
+        rem_set.update((yield from traverse_groups_steps(
+            context, [c.name for c in obj.children], direct)))
+
+    return selection_by_name([x for x in selected if x not in rem_set])
+
+
+def group_by_base_name(names):
+    """Groups "Name", "Name.001", "Name.002"... in a single pass.
+    The first name found is moved to the end of its group so it is the one
+    left once the group is joined"""
+    index = {}
+    for name in names:
+        index.setdefault(name.split(".")[0], []).append(name)
+
+    return [group[1:] + group[:1] for group in index.values() if len(group) > 1]
+
+
+def traverse_groups(context, selected, direct=False):
+    return finish_steps(traverse_groups_steps(context, selected, direct))
+
+
+def traverse_groups_steps(context, selected, direct=False):
+    """Generator version of traverse_groups, yields after each group is
+    joined and returns the names of the removed objects"""
+    obj_store = group_by_base_name(selected)
+
+    if direct:
+        rem_list = []
+        for group in obj_store:
+            objs = [context.scene.objects[obj] for obj in group]
+            objs = [obj for obj in objs if obj.type == "MESH"]
+            if len(objs) > 1:
+                rem_list.extend(join_objects(objs))
+                yield
+        return rem_list
 
     deselect_all(context)
     rem_list = []
@@ -102,32 +156,1078 @@ def traverse_groups(context, selected):
         bpy.ops.object.join()
         rem_list.pop(-1)
         context.view_layer.objects.active.select_set(False)
+        yield
 
     return rem_list
 
 
-def remove_doubles(selected, tolernace):
+def join_objects(objects):
+    """Joins objects into the last one by concatenating their mesh data,
+    without bpy.ops.object.join. Returns the names of the removed objects"""
+    target = objects[-1]
+    to_target = np.array(target.matrix_world.inverted(), dtype=np.float64)
+
+    materials = []
+    parts = []
+    for obj in objects:
+        arrays = mesh_to_arrays(obj.data)
+
+        # bake the object's transform relative to the target
+        mat = to_target @ np.array(obj.matrix_world, dtype=np.float64)
+        arrays["co"] = (arrays["co"] @ mat[:3, :3].T + mat[:3, 3]).astype(np.float32)
+
+        # remap material indices into the joined material list
+        slot_map = []
+        for slot in obj.material_slots or [None]:
+            mat_slot = slot.material if slot else None
+            if mat_slot not in materials:
+                materials.append(mat_slot)
+            slot_map.append(materials.index(mat_slot))
+        slot_map = np.array(slot_map, dtype=np.int32)
+        arrays["material_index"] = slot_map[
+            np.clip(arrays["material_index"], 0, len(slot_map) - 1)]
+
+        parts.append(arrays)
+
+    mesh = bpy.data.meshes.new(target.data.name)
+    arrays_to_mesh(mesh, concat_mesh_arrays(parts))
+    for mat_slot in materials:
+        mesh.materials.append(mat_slot)
+    target.data = mesh
+
+    removed = [obj for obj in objects if obj != target]
+    removed_set = set(removed)
+    for obj in removed:
+        for child in obj.children:
+            if child in removed_set:
+                continue
+            # re-parent children to the target like the join operator does
+            world = child.matrix_world.copy()
+            child.parent = target
+            child.matrix_parent_inverse = target.matrix_world.inverted()
+            child.matrix_world = world
+
+    names = [obj.name for obj in removed]
+    bpy.data.batch_remove(removed)
+    return names
+
+
+def remove_doubles(selected, tolernace, profile=None):
+    profile = profile or RunProfile()
     meshes = set(o.data for o in selected)
 
     bm = bmesh.new()
 
     for m in meshes:
+        profile.object_start()
         bm.from_mesh(m)
         bmesh.ops.remove_doubles(bm, verts=bm.verts, dist=tolernace)
         bm.to_mesh(m)
         m.update()
         bm.clear()
+        profile.object_end("remove doubles", m)
     bm.free()
 
 
+# cell offsets that find every pair of neighbouring cells exactly once
+HALF_NEIGHBOURS = [
+    (dx, dy, dz)
+    for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)
+    if (dx, dy, dz) > (0, 0, 0)
+]
+
+
+def find_close_pairs(co, dist):
+    """Returns index arrays (a, b) of all vertex pairs closer than dist.
+    Vertices are hashed into a grid of cells dist wide, so only the same and
+    neighbouring cells need checking"""
+    n = len(co)
+    cell = np.floor(co / dist).astype(np.int64)
+    # only occupied cells are numbered, so the mesh size does not matter
+    cells, cell_id = np.unique(cell, axis=0, return_inverse=True)
+    cell_id = cell_id.ravel()
+    n_cells = len(cells)
+    order = np.argsort(cell_id, kind="stable")
+    cell_count = np.bincount(cell_id, minlength=n_cells)
+    cell_start = np.cumsum(cell_count) - cell_count
+    d_sq = dist * dist
+
+    pairs_a = []
+    pairs_b = []
+    for offset in [(0, 0, 0)] + HALF_NEIGHBOURS:
+        # number of the occupied cell at each cell + offset, -1 when empty
+        both, inverse = np.unique(
+            np.concatenate([cells, cells + offset]), axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        occupied = np.full(len(both), -1, dtype=np.int64)
+        occupied[inverse[:n_cells]] = np.arange(n_cells)
+        neighbour = occupied[inverse[n_cells:]][cell_id]
+
+        found = neighbour >= 0
+        lo = np.where(found, cell_start[neighbour], 0)
+        counts = np.where(found, cell_count[neighbour], 0)
+        total = int(counts.sum())
+        if not total:
+            continue
+        # expand each vertex against every vertex in the neighbouring cell
+        a = np.repeat(np.arange(n), counts)
+        within = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        b = order[np.repeat(lo, counts) + within]
+        if offset == (0, 0, 0):
+            keep = a < b
+            a, b = a[keep], b[keep]
+        close = ((co[a] - co[b]) ** 2).sum(axis=1) <= d_sq
+        pairs_a.append(a[close])
+        pairs_b.append(b[close])
+
+    if not pairs_a:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(pairs_a), np.concatenate(pairs_b)
+
+
+def weld_targets(n, a, b):
+    """Picks the vertex each vertex merges into from close pairs (a, b).
+    Like bmesh remove_doubles, going up by index each vertex not yet merged
+    keeps its place and takes every unmerged vertex close to it. Vertices only
+    ever merge into one within the distance, chains do not collapse"""
+    lo, hi = np.minimum(a, b), np.maximum(a, b)
+    involved = np.zeros(n, dtype=bool)
+    involved[lo] = involved[hi] = True
+    # 0 undecided, 1 kept, 2 merged
+    state = np.zeros(n, dtype=np.int8)
+    target = np.arange(n)
+    while len(lo):
+        # kept when no unmerged vertex below it is close
+        blocked = np.zeros(n, dtype=bool)
+        blocked[hi] = True
+        state[(state == 0) & involved & ~blocked] = 1
+
+        # merged into the lowest unmerged vertex below it, once that is kept
+        lowest = np.full(n, n)
+        np.minimum.at(lowest, hi, lo)
+        take = (state[hi] == 0) & (lo == lowest[hi]) & (state[lo] == 1)
+        target[hi[take]] = lo[take]
+        state[hi[take]] = 2
+
+        unmerged = (state[lo] != 2) & (state[hi] != 2)
+        lo, hi = lo[unmerged], hi[unmerged]
+    return target
+
+
+def weld_arrays(arrays, dist):
+    """Merges vertices closer than dist, see weld_targets.
+    Returns the arrays unchanged when nothing was merged"""
+    co = arrays["co"]
+    a, b = find_close_pairs(co.astype(np.float64), dist)
+    if not len(a):
+        return arrays
+
+    labels = weld_targets(len(co), a, b)
+    roots, remap = np.unique(labels, return_inverse=True)
+    loop_verts = remap[arrays["loop_verts"]]
+
+    # drop loops that now repeat the previous vertex of their polygon
+    loop_starts = arrays["loop_starts"]
+    loop_totals = arrays["loop_totals"]
+    prev = np.arange(len(loop_verts)) - 1
+    prev[loop_starts] = loop_starts + loop_totals - 1
+    keep_loop = loop_verts != loop_verts[prev]
+
+    # and polygons left with fewer than 3 corners, or using a vertex twice
+    loop_poly = np.repeat(np.arange(len(loop_starts)), loop_totals)
+    new_totals = np.bincount(loop_poly[keep_loop], minlength=len(loop_starts))
+    keep_poly = new_totals >= 3
+    kept = np.flatnonzero(keep_loop)
+    order = np.lexsort((loop_verts[kept], loop_poly[kept]))
+    p_sorted = loop_poly[kept][order]
+    v_sorted = loop_verts[kept][order]
+    repeat = (p_sorted[1:] == p_sorted[:-1]) & (v_sorted[1:] == v_sorted[:-1])
+    keep_poly[p_sorted[1:][repeat]] = False
+    keep_loop &= keep_poly[loop_poly]
+    new_totals = new_totals[keep_poly]
+
+    loose_edges = remap[arrays["loose_edges"]]
+    loose_edges = loose_edges[loose_edges[:, 0] != loose_edges[:, 1]]
+
+    return {
+        "co": co[roots],
+        "loop_verts": loop_verts[keep_loop],
+        "loop_starts": (np.cumsum(new_totals) - new_totals).astype(np.int32),
+        "loop_totals": new_totals.astype(np.int32),
+        "material_index": arrays["material_index"][keep_poly],
+        "use_smooth": arrays["use_smooth"][keep_poly],
+        "loose_edges": loose_edges,
+        "uvs": [(name, uv[keep_loop]) for name, uv in arrays["uvs"]],
+    }
+
+
+def weld_vertices(selected, tolerance, profile=None):
+    """Vectorized alternative to remove_doubles, see weld_arrays"""
+    profile = profile or RunProfile()
+    meshes = set(o.data for o in selected)
+
+    for m in meshes:
+        if not len(m.vertices):
+            continue
+        profile.object_start()
+        arrays = mesh_to_arrays(m)
+        welded = weld_arrays(arrays, tolerance)
+        if welded is not arrays:
+            arrays_to_mesh(m, welded)
+        profile.object_end("remove doubles", m)
+
+
+def canonical_rows(rows):
+    """Rotates each row so its lowest vertex comes first, keeping the winding"""
+    shift = rows.argmin(axis=1)
+    k = rows.shape[1]
+    cols = (shift[:, None] + np.arange(k)) % k
+    return np.take_along_axis(rows, cols, axis=1)
+
+
+def cull_face_indices(arrays, min_area):
+    """Finds polygons that add nothing to the shape of a mesh.
+    Returns {"degenerate": ..., "duplicate": ..., "back to back": ...} index
+    arrays. Of each set of polygons on the same vertices the lowest index is
+    kept, others are duplicates when wound the same way, back to back when
+    wound the opposite way"""
+    co = arrays["co"].astype(np.float64)
+    loop_verts = arrays["loop_verts"]
+    loop_starts = arrays["loop_starts"]
+    loop_totals = arrays["loop_totals"]
+    n_polys = len(loop_starts)
+    empty = np.empty(0, dtype=np.int64)
+    if not n_polys:
+        return {"degenerate": empty, "duplicate": empty, "back to back": empty}
+
+    # Newell's method, twice the area of any planar or near planar polygon
+    loop_poly = np.repeat(np.arange(n_polys), loop_totals)
+    following = np.arange(len(loop_verts)) + 1
+    last = loop_starts + loop_totals - 1
+    following[last] = loop_starts
+    cross = np.cross(co[loop_verts], co[loop_verts[following]])
+    normal = np.stack([np.bincount(loop_poly, cross[:, i], minlength=n_polys)
+                       for i in range(3)], axis=1)
+    area = np.linalg.norm(normal, axis=1) / 2
+    degenerate = area <= min_area
+
+    duplicate = []
+    back_to_back = []
+    for k in np.unique(loop_totals):
+        polys = np.flatnonzero((loop_totals == k) & ~degenerate)
+        if len(polys) < 2:
+            continue
+        rows = loop_verts[loop_starts[polys][:, None] + np.arange(k)]
+        _keys, group, counts = np.unique(
+            np.sort(rows, axis=1), axis=0, return_inverse=True, return_counts=True)
+        group = group.ravel()
+        shared = counts[group] > 1
+        if not shared.any():
+            continue
+        polys, rows, group = polys[shared], rows[shared], group[shared]
+
+        # the lowest polygon of each group is kept, compare the rest to it
+        order = np.lexsort((polys, group))
+        polys, rows, group = polys[order], rows[order], group[order]
+        first = np.r_[True, group[1:] != group[:-1]]
+        kept = np.flatnonzero(first)[np.cumsum(first) - 1]
+
+        forward = canonical_rows(rows)
+        reverse = canonical_rows(rows[:, ::-1])
+        same = np.all(forward == forward[kept], axis=1) & ~first
+        flipped = np.all(forward == reverse[kept], axis=1) & ~first & ~same
+        duplicate.append(polys[same])
+        back_to_back.append(polys[flipped])
+
+    return {
+        "degenerate": np.flatnonzero(degenerate),
+        "duplicate": np.concatenate(duplicate) if duplicate else empty,
+        "back to back": np.concatenate(back_to_back) if back_to_back else empty,
+    }
+
+
+def cull_faces(selected, min_area, profile=None):
+    """Removes degenerate, duplicate and back to back faces from the meshes
+    of selected. Faces are found on arrays, only meshes with something to
+    remove go through bmesh. Edges and vertices only the removed faces used
+    go with them. Returns the number removed per category"""
+    profile = profile or RunProfile()
+    totals = {"degenerate": 0, "duplicate": 0, "back to back": 0}
+
+    bm = bmesh.new()
+    for obj in unique_mesh_objects(selected):
+        m = obj.data
+        profile.object_start()
+        found = cull_face_indices(mesh_to_arrays(m), min_area)
+        remove = np.concatenate(list(found.values()))
+        if len(remove):
+            bm.from_mesh(m)
+            bm.faces.ensure_lookup_table()
+            bmesh.ops.delete(bm, geom=[bm.faces[i] for i in remove.tolist()], context="FACES")
+            bm.to_mesh(m)
+            m.update()
+            bm.clear()
+            for category, indices in found.items():
+                totals[category] += len(indices)
+        profile.object_end("cull faces", m)
+    bm.free()
+    return totals
+
+
+def group_by_mesh(selected):
+    """Objects of selected grouped by mesh datablock, in selection order"""
+    users = {}
+    for obj in selected:
+        users.setdefault(obj.data, []).append(obj)
+    return users
+
+
+def unique_mesh_objects(selected):
+    """One object per mesh datablock, so per mesh work runs once"""
+    return [objs[0] for objs in group_by_mesh(selected).values()]
+
+
+def make_single_user(selected):
+    """Gives every object in selected whose mesh has other users its own copy"""
+    for obj in selected:
+        if obj.data.users > 1:
+            obj.data = obj.data.copy()
+
+
 def apply_transforms(selected, context: bpy.context):
+    """Applies transforms of objects with single user meshes.
+    Shared meshes are skipped, applying one user's transform would move
+    every other instance. Use make_single_user first to apply them anyway"""
     for obj in selected:
+        if obj.data.users > 1:
+            continue
         obj.select_set(True)
         context.view_layer.objects.active = obj
         bpy.ops.object.transform_apply()
         obj.select_set(False)
 
 
+def instance_fingerprint(obj, arrays, tolerance):
+    """Hash that is the same for meshes identical up to a rigid transform.
+    Combines topology, materials and the sorted world space edge lengths
+    snapped to tolerance"""
+    mat = np.array(obj.matrix_world, dtype=np.float64)
+    co = arrays["co"] @ mat[:3, :3].T + mat[:3, 3]
+
+    loop_verts = arrays["loop_verts"]
+    next_loop = np.arange(1, len(loop_verts) + 1)
+    ends = arrays["loop_starts"] + arrays["loop_totals"] - 1
+    next_loop[ends] = arrays["loop_starts"]
+    lengths = np.linalg.norm(co[loop_verts] - co[loop_verts[next_loop]], axis=1)
+    lengths = np.round(np.sort(lengths) / tolerance).astype(np.int64)
+
+    h = hashlib.sha1()
+    h.update(repr((len(co), len(arrays["uvs"]),
+                   [m.name if m else "" for m in obj.data.materials])).encode())
+    for key in ("loop_verts", "loop_totals", "material_index", "loose_edges"):
+        h.update(np.ascontiguousarray(arrays[key]).tobytes())
+    h.update(lengths.tobytes())
+    return h.hexdigest(), co
+
+
+def rigid_transform(src, dst, tolerance):
+    """Rotation and translation mapping src onto dst point for point, or None
+    if there is none within tolerance (mirrored copies are not matched)"""
+    src_centre = src.mean(axis=0)
+    dst_centre = dst.mean(axis=0)
+    u, _s, vt = np.linalg.svd((src - src_centre).T @ (dst - dst_centre))
+    rot = vt.T @ u.T
+    if np.linalg.det(rot) < 0:
+        return None
+    trans = dst_centre - src_centre @ rot.T
+    if np.abs(src @ rot.T + trans - dst).max() > tolerance:
+        return None
+    return rot, trans
+
+
+def instances_wanted(settings):
+    """Linking instances is pointless when applying transforms would give
+    every shared mesh a private copy again"""
+    return settings.dc_link_instances_bool and not (
+        settings.dc_apply_transforms and settings.dc_shared_transforms_enum == "SINGLE_USER")
+
+
+def link_instances(selected, tolerance):
+    """Replaces meshes identical up to a rigid transform with linked copies
+    of one mesh, keeping every object where it was. Returns the number of
+    objects that were linked"""
+    groups = {}
+    for obj in selected:
+        arrays = mesh_to_arrays(obj.data)
+        if not len(arrays["co"]):
+            continue
+        key, world_co = instance_fingerprint(obj, arrays, tolerance)
+        groups.setdefault(key, []).append((obj, world_co, arrays["uvs"]))
+
+    linked = 0
+    for members in groups.values():
+        canonicals = []
+        for obj, world_co, uvs in members:
+            for canon, canon_co, canon_uvs in canonicals:
+                if obj.data == canon.data:
+                    break
+                if not all(np.allclose(uv, canon_uv, atol=1e-4)
+                           for (_n, uv), (_cn, canon_uv) in zip(uvs, canon_uvs)):
+                    continue
+                found = rigid_transform(canon_co, world_co, tolerance)
+                if found is None:
+                    continue
+
+                rot, trans = found
+                offset = np.identity(4)
+                offset[:3, :3] = rot
+                offset[:3, 3] = trans
+                children = [(child, child.matrix_world.copy()) for child in obj.children]
+                obj.data = canon.data
+                obj.matrix_world = Matrix((offset @ np.array(canon.matrix_world)).tolist())
+                for child, world in children:
+                    child.matrix_world = world
+                linked += 1
+                break
+            else:
+                canonicals.append((obj, world_co, uvs))
+
+    return linked
+
+
+def object_depth(obj):
+    depth = 0
+    while obj.parent:
+        obj = obj.parent
+        depth += 1
+    return depth
+
+
+def flipped_corner_order(loop_starts, loop_totals, flip):
+    """Corner each corner takes its data from once the faces in flip are
+    reversed keeping their first corner, v0 v1 v2 v3 -> v0 v3 v2 v1, the
+    order Mesh.flip_normals uses"""
+    n_loops = int(loop_totals.sum())
+    loop_poly = np.repeat(np.arange(len(loop_totals)), loop_totals)
+    start = loop_starts[loop_poly]
+    total = loop_totals[loop_poly]
+    pos = np.arange(n_loops) - start
+    return np.where(flip[loop_poly], start + (total - pos) % total, np.arange(n_loops))
+
+
+def bake_matrix(mesh, mat):
+    """Transforms the vertices, and any custom normals, of mesh by mat"""
+    mat = np.array(mat, dtype=np.float64)
+    rot = mat[:3, :3]
+
+    normals = None
+    if mesh.has_custom_normals:
+        normals = np.empty(len(mesh.loops) * 3, dtype=np.float32)
+        if hasattr(mesh, "corner_normals"):
+            mesh.corner_normals.foreach_get("vector", normals)
+        else:
+            mesh.calc_normals_split()
+            mesh.loops.foreach_get("normal", normals)
+        # normals use the inverse transpose so scaling does not skew them
+        normals = normals.reshape(-1, 3) @ np.linalg.inv(rot)
+        normals /= np.maximum(np.linalg.norm(normals, axis=1), 1e-12)[:, None]
+
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    co = co.reshape(-1, 3) @ rot.T + mat[:3, 3]
+    mesh.vertices.foreach_set("co", co.astype(np.float32).ravel())
+
+    # mirroring turns faces inside out, flip them back like transform_apply
+    if np.linalg.det(rot) < 0 and hasattr(mesh, "flip_normals"):
+        mesh.flip_normals()
+        # flip_normals leaves custom normals alone, follow the reversed corners
+        if normals is not None:
+            loop_starts = np.empty(len(mesh.polygons), dtype=np.int32)
+            loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+            mesh.polygons.foreach_get("loop_start", loop_starts)
+            mesh.polygons.foreach_get("loop_total", loop_totals)
+            normals = normals[flipped_corner_order(
+                loop_starts, loop_totals, np.ones(len(loop_totals), dtype=bool))]
+    if normals is not None:
+        mesh.normals_split_custom_set(normals)
+    mesh.update()
+
+
+def apply_transforms_bulk(selected, context: bpy.context):
+    """Same result as apply_transforms without an operator call per object.
+    Objects are handled a hierarchy level at a time, parents first, and the
+    children of every level are put back where they were"""
+    objs = [obj for obj in selected if obj.data.users == 1]
+
+    levels = {}
+    for obj in objs:
+        levels.setdefault(object_depth(obj), []).append(obj)
+
+    for depth in sorted(levels):
+        level = levels[depth]
+        children = [(c, c.matrix_world.copy()) for obj in level for c in obj.children]
+
+        for obj in level:
+            bake_matrix(obj.data, obj.matrix_basis)
+            obj.matrix_basis.identity()
+
+        context.view_layer.update()
+        for child, world in children:
+            child.matrix_world = world
+        if children:
+            context.view_layer.update()
+
+
+#############################################
+# MATERIAL DEDUP
+############################################
+# node properties every node has, they do not change how it shades
+NODE_BASE_PROPS = {
+    "rna_type", "type", "location", "width", "width_hidden", "height", "dimensions",
+    "name", "label", "inputs", "outputs", "internal_links", "parent", "use_custom_color",
+    "color", "select", "show_options", "show_preview", "hide", "mute", "show_texture",
+    "bl_idname", "bl_label", "bl_description", "bl_icon", "bl_static_type",
+    "bl_width_default", "bl_width_min", "bl_width_max", "bl_height_default",
+    "bl_height_min", "bl_height_max", "location_absolute", "warning_propagation",
+}
+# how deep nested structs are compared, a curve mapping's points sit at 3
+STRUCT_DEPTH = 5
+# material settings that change how it looks in the viewport or render
+MATERIAL_PROPS = (
+    "use_nodes", "diffuse_color", "metallic", "roughness", "blend_method",
+    "use_backface_culling", "alpha_threshold", "pass_index",
+)
+
+
+def fingerprint_value(value, image_keys, depth=0):
+    if isinstance(value, bpy.types.Image):
+        return image_keys.get(value, value.name)
+    if isinstance(value, bpy.types.ID):
+        return value.name
+    if isinstance(value, bpy.types.bpy_struct):
+        # settings structs like color_ramp and curve mapping shade too,
+        # compare their properties, elements and points
+        if depth >= STRUCT_DEPTH:
+            return None
+        return tuple(
+            (prop.identifier, fingerprint_value(getattr(value, prop.identifier), image_keys, depth + 1))
+            for prop in value.bl_rna.properties if prop.identifier != "rna_type")
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(value))
+    if isinstance(value, float):
+        return round(value, 5)
+    if isinstance(value, (bool, int, str)) or value is None:
+        return value
+    try:
+        return tuple(fingerprint_value(v, image_keys, depth + 1) for v in value)
+    except TypeError:
+        return type(value).__name__
+
+
+def node_signature(node, image_keys):
+    props = tuple(
+        (prop.identifier, fingerprint_value(getattr(node, prop.identifier), image_keys))
+        for prop in node.bl_rna.properties
+        if prop.identifier not in NODE_BASE_PROPS and prop.type != "COLLECTION")
+    inputs = tuple(
+        (i, fingerprint_value(socket.default_value, image_keys))
+        for i, socket in enumerate(node.inputs)
+        if not socket.is_linked and hasattr(socket, "default_value"))
+    return (node.bl_idname, props, inputs)
+
+
+def material_fingerprint(material, image_keys):
+    """Hash of what a material looks like, ignoring names and node layout.
+    Materials that differ only in names get the same fingerprint"""
+    settings = tuple(fingerprint_value(getattr(material, p, None), image_keys)
+                     for p in MATERIAL_PROPS)
+    nodes = []
+    links = []
+    if material.use_nodes and material.node_tree:
+        signatures = {node: node_signature(node, image_keys) for node in material.node_tree.nodes}
+        order = sorted(signatures, key=lambda n: repr(signatures[n]))
+        index = {node: i for i, node in enumerate(order)}
+        nodes = [signatures[node] for node in order]
+        links = sorted(
+            (index[link.from_node], link.from_socket.identifier,
+             index[link.to_node], link.to_socket.identifier)
+            for link in material.node_tree.links)
+    return hashlib.blake2b(repr((settings, nodes, links)).encode(), digest_size=16).hexdigest()
+
+
+def image_pixel_hash(image):
+    pixels = np.empty(len(image.pixels), dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+    return hashlib.blake2b(pixels.tobytes(), digest_size=16).hexdigest()
+
+
+def image_keys(images):
+    """Canonical key of each image, its file when unchanged on disk, else a
+    hash of its pixels. Pixels are only read for images with a same sized
+    image under another key"""
+    keys = {}
+    for image in images:
+        if image.filepath and not image.packed_file and not image.is_dirty:
+            keys[image] = os.path.normcase(os.path.abspath(bpy.path.abspath(image.filepath, library=image.library)))
+        else:
+            keys[image] = image.name
+
+    by_size = {}
+    for image in images:
+        if image.has_data or image.source == "FILE":
+            by_size.setdefault((tuple(image.size), image.channels), []).append(image)
+    for group in by_size.values():
+        if len(set(keys[image] for image in group)) < 2:
+            continue
+        for image in group:
+            try:
+                keys[image] = image_pixel_hash(image)
+            except (RuntimeError, ValueError):
+                # missing files have no pixels, they keep their path key
+                pass
+    return keys
+
+
+def canonical_groups(keys):
+    """Groups items sharing a key, shortest name first so the plain name is
+    kept over SketchUp's "name-material" and "name1" copies"""
+    groups = {}
+    for item, key in keys.items():
+        groups.setdefault(key, []).append(item)
+    return [sorted(group, key=lambda i: (len(i.name), i.name))
+            for group in groups.values() if len(group) > 1]
+
+
+def merge_material_slots(mesh):
+    """Merges slots of mesh that hold the same material.
+    Returns the number of slots removed"""
+    materials = list(mesh.materials)
+    unique = list(dict.fromkeys(materials))
+    if len(unique) == len(materials):
+        return 0
+
+    slot_map = np.array([unique.index(m) for m in materials], dtype=np.int32)
+    indices = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("material_index", indices)
+    mesh.materials.clear()
+    for material in unique:
+        mesh.materials.append(material)
+    mesh.polygons.foreach_set(
+        "material_index", slot_map[np.clip(indices, 0, len(slot_map) - 1)])
+    mesh.update()
+    return len(materials) - len(unique)
+
+
+def dedup_stats(profile, stats):
+    images, materials, slots = stats
+    profile.count("images merged", images)
+    profile.count("materials merged", materials)
+    profile.count("slots merged", slots)
+
+
+def dedup_materials(selected):
+    """Remaps duplicate images and materials used by selected to one copy each,
+    then merges slots of a mesh that end up holding the same material.
+    Returns (images merged, materials merged, slots merged)"""
+    meshes = {obj.data for obj in selected if obj.type == "MESH"}
+    materials = {m for mesh in meshes for m in mesh.materials if m is not None}
+    images = {node.image for m in materials if m.node_tree for node in m.node_tree.nodes
+              if getattr(node, "image", None) is not None}
+
+    merged_images = []
+    keys = image_keys(images)
+    for group in canonical_groups(keys):
+        for image in group[1:]:
+            image.user_remap(group[0])
+            keys[image] = keys[group[0]]
+            merged_images.append(image)
+
+    merged_materials = []
+    fingerprints = {m: material_fingerprint(m, keys) for m in materials}
+    for group in canonical_groups(fingerprints):
+        for material in group[1:]:
+            material.user_remap(group[0])
+            merged_materials.append(material)
+
+    # objects with object linked slots keep their own slot order
+    object_linked = {obj.data for obj in selected if obj.type == "MESH"
+                     and any(slot.link == "OBJECT" for slot in obj.material_slots)}
+    slots = sum(merge_material_slots(mesh) for mesh in meshes - object_linked)
+
+    delete_objects([i for i in merged_materials + merged_images if not i.use_fake_user])
+    return len(merged_images), len(merged_materials), slots
+
+
+#############################################
+# MESH ARRAYS
+############################################
+def mesh_to_arrays(mesh):
+    """Reads the geometry of a mesh into numpy arrays"""
+    n_verts = len(mesh.vertices)
+    n_loops = len(mesh.loops)
+    n_polys = len(mesh.polygons)
+
+    co = np.empty(n_verts * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    loop_verts = np.empty(n_loops, dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_verts)
+    loop_starts = np.empty(n_polys, dtype=np.int32)
+    mesh.polygons.foreach_get("loop_start", loop_starts)
+    loop_totals = np.empty(n_polys, dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", loop_totals)
+    material_index = np.empty(n_polys, dtype=np.int32)
+    mesh.polygons.foreach_get("material_index", material_index)
+    use_smooth = np.empty(n_polys, dtype=bool)
+    mesh.polygons.foreach_get("use_smooth", use_smooth)
+
+    # edges are rebuilt from the polygons, only loose edges need storing
+    edges = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get("vertices", edges)
+    loop_edges = np.empty(n_loops, dtype=np.int32)
+    mesh.loops.foreach_get("edge_index", loop_edges)
+    is_loose = np.ones(len(mesh.edges), dtype=bool)
+    is_loose[loop_edges] = False
+
+    uvs = []
+    for layer in mesh.uv_layers:
+        uv = np.empty(n_loops * 2, dtype=np.float32)
+        layer.data.foreach_get("uv", uv)
+        uvs.append((layer.name, uv.reshape(-1, 2)))
+
+    return {
+        "co": co.reshape(-1, 3),
+        "loop_verts": loop_verts,
+        "loop_starts": loop_starts,
+        "loop_totals": loop_totals,
+        "material_index": material_index,
+        "use_smooth": use_smooth,
+        "loose_edges": edges.reshape(-1, 2)[is_loose],
+        "uvs": uvs,
+    }
+
+
+def arrays_to_mesh(mesh, arrays):
+    """Replaces the geometry of a mesh with arrays from mesh_to_arrays.
+    Materials are kept, other custom data layers are not"""
+    mesh.clear_geometry()
+
+    mesh.vertices.add(len(arrays["co"]))
+    mesh.edges.add(len(arrays["loose_edges"]))
+    mesh.loops.add(len(arrays["loop_verts"]))
+    mesh.polygons.add(len(arrays["loop_starts"]))
+
+    mesh.vertices.foreach_set("co", np.ascontiguousarray(arrays["co"], dtype=np.float32).ravel())
+    mesh.edges.foreach_set("vertices", arrays["loose_edges"].astype(np.int32).ravel())
+    mesh.loops.foreach_set("vertex_index", arrays["loop_verts"].astype(np.int32))
+    mesh.polygons.foreach_set("loop_start", arrays["loop_starts"].astype(np.int32))
+    if bpy.app.version < (3, 6, 0):
+        mesh.polygons.foreach_set("loop_total", arrays["loop_totals"].astype(np.int32))
+    mesh.polygons.foreach_set("material_index", arrays["material_index"].astype(np.int32))
+    mesh.polygons.foreach_set("use_smooth", arrays["use_smooth"].astype(bool))
+
+    for name, uv in arrays["uvs"]:
+        layer = mesh.uv_layers.new(name=name)
+        if layer is None:
+            break
+        layer.data.foreach_set("uv", np.ascontiguousarray(uv, dtype=np.float32).ravel())
+
+    mesh.update(calc_edges=True)
+
+
+def concat_mesh_arrays(parts):
+    """Concatenates arrays from mesh_to_arrays into a single mesh.
+    UV layers are merged by position, named after the first part that has them"""
+    v_offsets = np.cumsum([0] + [len(a["co"]) for a in parts])
+    l_offsets = np.cumsum([0] + [len(a["loop_verts"]) for a in parts])
+
+    uv_names = []
+    for a in parts:
+        for i, (name, _uv) in enumerate(a["uvs"]):
+            if i == len(uv_names):
+                uv_names.append(name)
+
+    uvs = []
+    for i, name in enumerate(uv_names):
+        uvs.append((name, np.concatenate(
+            [a["uvs"][i][1] if i < len(a["uvs"]) else
+             np.zeros((len(a["loop_verts"]), 2), dtype=np.float32)
+             for a in parts])))
+
+    return {
+        "co": np.concatenate([a["co"] for a in parts]),
+        "loop_verts": np.concatenate(
+            [a["loop_verts"] + v_offsets[i] for i, a in enumerate(parts)]),
+        "loop_starts": np.concatenate(
+            [a["loop_starts"] + l_offsets[i] for i, a in enumerate(parts)]),
+        "loop_totals": np.concatenate([a["loop_totals"] for a in parts]),
+        "material_index": np.concatenate([a["material_index"] for a in parts]),
+        "use_smooth": np.concatenate([a["use_smooth"] for a in parts]),
+        "loose_edges": np.concatenate(
+            [a["loose_edges"] + v_offsets[i] for i, a in enumerate(parts)]),
+        "uvs": uvs,
+    }
+
+
+def join_scope(context):
+    """Selected objects and their children, everything a join can change"""
+    objects = list(context.selected_objects)
+    seen = set(objects)
+    for obj in context.selected_objects:
+        for child in obj.children:
+            if child not in seen:
+                seen.add(child)
+                objects.append(child)
+    return objects
+
+
+def join_selection(context):
+    """Joins the loose faces of the selection with the chosen strategy.
+    Returns the objects left to clean"""
+    return finish_steps(join_selection_steps(context))
+
+
+def join_selection_steps(context):
+    """Generator version of join_selection, yields after each group or grid
+    cell is joined"""
+    settings = context.scene.dc_settings
+    names = [obj.name for obj in context.selected_objects]
+    if settings.dc_join_strategy_enum == "GRID":
+        return (yield from join_by_grid_steps(
+            context, names, settings.dc_grid_cell_float, settings.dc_grid_vertex_budget_int))
+    return (yield from join_loose_faces_steps(context, names, settings.dc_fast_join_bool))
+
+
+def split_by_material(arrays):
+    """Splits arrays from mesh_to_arrays by polygon material index.
+    Returns {material_index: arrays}, each part only keeps the vertices its
+    polygons use. Loose edges go to the first part"""
+    indices = np.unique(arrays["material_index"])
+    if len(indices) <= 1:
+        return {int(indices[0]) if len(indices) else 0: arrays}
+
+    parts = {}
+    for n, index in enumerate(indices):
+        poly_mask = arrays["material_index"] == index
+        loop_mask = np.repeat(poly_mask, arrays["loop_totals"])
+        loop_verts = arrays["loop_verts"][loop_mask]
+        loose_edges = arrays["loose_edges"] if n == 0 else np.empty((0, 2), dtype=np.int32)
+
+        used, inverse = np.unique(
+            np.concatenate([loop_verts, loose_edges.ravel()]), return_inverse=True)
+        loop_totals = arrays["loop_totals"][poly_mask]
+
+        parts[int(index)] = {
+            "co": arrays["co"][used],
+            "loop_verts": inverse[:len(loop_verts)].astype(np.int32),
+            "loop_starts": (np.cumsum(loop_totals) - loop_totals).astype(np.int32),
+            "loop_totals": loop_totals,
+            "material_index": np.zeros(len(loop_totals), dtype=np.int32),
+            "use_smooth": arrays["use_smooth"][poly_mask],
+            "loose_edges": inverse[len(loop_verts):].reshape(-1, 2).astype(np.int32),
+            "uvs": [(name, uv[loop_mask]) for name, uv in arrays["uvs"]],
+        }
+    return parts
+
+
+#############################################
+# GRID JOIN
+############################################
+GRID_MAX_DEPTH = 8
+
+
+def world_centers(objects):
+    """World space bounding box centres of objects, as an (n, 3) array"""
+    centers = np.empty((len(objects), 3), dtype=np.float64)
+    for i, obj in enumerate(objects):
+        corners = np.array(obj.bound_box, dtype=np.float64)
+        mat = np.array(obj.matrix_world, dtype=np.float64)
+        centers[i] = corners.mean(axis=0) @ mat[:3, :3].T + mat[:3, 3]
+    return centers
+
+
+def split_cell(items, centers, counts, budget, depth=0):
+    """Splits a cell into octants around the centre of its objects until each
+    holds at most budget vertices. A cell with a single object, or objects
+    that can no longer be separated, is kept whole"""
+    if counts[items].sum() <= budget or len(items) == 1 or depth >= GRID_MAX_DEPTH:
+        return [items]
+
+    pts = centers[items]
+    mid = (pts.min(axis=0) + pts.max(axis=0)) / 2
+    octant = (pts >= mid) @ np.array([1, 2, 4])
+    if np.all(octant == octant[0]):
+        return [items]
+
+    cells = []
+    for o in np.unique(octant):
+        cells.extend(split_cell(items[octant == o], centers, counts, budget, depth + 1))
+    return cells
+
+
+def grid_cells(objects, cell_size, budget):
+    """Buckets objects into a grid of cell_size by world space centre, cells
+    over the vertex budget are split further like an octree.
+    Returns lists of indices into objects"""
+    if not objects:
+        return []
+    centers = world_centers(objects)
+    counts = np.array([len(obj.data.vertices) for obj in objects], dtype=np.int64)
+
+    keys = np.floor(centers / max(cell_size, 1e-6)).astype(np.int64)
+    _keys, cell_of = np.unique(keys, axis=0, return_inverse=True)
+    cell_of = cell_of.ravel()
+
+    cells = []
+    for cell in range(cell_of.max() + 1):
+        cells.extend(split_cell(np.flatnonzero(cell_of == cell), centers, counts, budget))
+    return cells
+
+
+def join_cell(context, objects, name):
+    """Merges objects into one new object per material, in world space.
+    Returns the new objects"""
+    by_material = {}
+    for obj in objects:
+        arrays = mesh_to_arrays(obj.data)
+        mat = np.array(obj.matrix_world, dtype=np.float64)
+        arrays["co"] = (arrays["co"] @ mat[:3, :3].T + mat[:3, 3]).astype(np.float32)
+
+        slots = [slot.material for slot in obj.material_slots] or [None]
+        for index, part in split_by_material(arrays).items():
+            material = slots[min(index, len(slots) - 1)]
+            by_material.setdefault(material, []).append(part)
+
+    # keep the new objects where the first object was in the hierarchy
+    first = objects[0]
+    collections = first.users_collection or [context.scene.collection]
+
+    joined = []
+    for material, parts in by_material.items():
+        label = "%s_%s" % (name, material.name if material else "None")
+        mesh = bpy.data.meshes.new(label)
+        arrays_to_mesh(mesh, concat_mesh_arrays(parts))
+        mesh.materials.append(material)
+
+        obj = bpy.data.objects.new(label, mesh)
+        for collection in collections:
+            collection.objects.link(obj)
+        if first.parent is not None:
+            obj.parent = first.parent
+            obj.matrix_parent_inverse = first.parent.matrix_world.inverted()
+        joined.append(obj)
+    return joined
+
+
+def join_by_grid(context, selected, cell_size, budget):
+    """Alternative to join_loose_faces that joins the mesh children of the
+    selection by location instead of by name.
+    Returns the remaining selected objects followed by the joined ones"""
+    return finish_steps(join_by_grid_steps(context, selected, cell_size, budget))
+
+
+def join_by_grid_steps(context, selected, cell_size, budget):
+    """Generator version of join_by_grid, yields after each cell is joined"""
+    objects = []
+    seen = set()
+    for name in selected:
+        obj = context.scene.objects.get(name)
+        if obj is None:
+            continue
+        for child in obj.children:
+            if child.type == "MESH" and child.name not in seen:
+                seen.add(child.name)
+                objects.append(child)
+
+    joined = []
+    removed = []
+    try:
+        for n, cell in enumerate(grid_cells(objects, cell_size, budget)):
+            cell_objects = [objects[i] for i in cell]
+            parent = cell_objects[0].parent
+            joined.extend(join_cell(
+                context, cell_objects, "%s_cell%03d" % (parent.name if parent else "Grid", n)))
+            removed.extend(cell_objects)
+            yield
+    finally:
+        # also runs when the generator is closed early, so a joined cell
+        # never stays in the scene next to the objects it was made from
+        removed_set = set(removed)
+        for obj in removed:
+            for child in obj.children:
+                if child in removed_set:
+                    continue
+                # children of joined objects move up to the joined object's parent
+                world = child.matrix_world.copy()
+                child.parent = obj.parent
+                child.matrix_world = world
+
+        removed_names = {obj.name for obj in removed}
+        delete_objects(removed)
+
+    remaining = selection_by_name([x for x in selected if x not in removed_names])
+    select_objects(joined)
+    return remaining + joined
+
+
+def delete_objects(objects):
+    """Removes objects through bpy.data in one call, no selection or operator"""
+    if objects:
+        bpy.data.batch_remove(list(objects))
+
+
+#############################################
+# ORPHAN PURGE
+############################################
+PURGE_COLLECTIONS = ("meshes", "materials", "images", "cameras")
+
+
+def id_user_snapshot():
+    """User counts of the datablocks the purge may remove, taken before a run"""
+    return {
+        name: {id_data: id_data.users for id_data in getattr(bpy.data, name)}
+        for name in PURGE_COLLECTIONS
+    }
+
+
+def estimate_id_bytes(id_data):
+    """Rough memory use of the bulk data of a mesh or image"""
+    if isinstance(id_data, bpy.types.Mesh):
+        return (len(id_data.vertices) * 12 + len(id_data.edges) * 8 +
+                len(id_data.loops) * (8 + 8 * len(id_data.uv_layers)) +
+                len(id_data.polygons) * 8)
+    if isinstance(id_data, bpy.types.Image) and id_data.has_data:
+        width, height = id_data.size
+        return width * height * id_data.channels * (4 if id_data.is_float else 1)
+    return 0
+
+
+def purge_orphans(before):
+    """Removes datablocks a run left without users, whether it created them
+    or they had users before. Orphans from before the run are left alone.
+    Returns the number freed per collection and the estimated bytes"""
+    freed = {name: 0 for name in PURGE_COLLECTIONS}
+    freed_bytes = 0
+
+    # removing meshes can orphan their materials, and materials their images
+    while True:
+        orphans = []
+        for name in PURGE_COLLECTIONS:
+            users_before = before[name]
+            for id_data in getattr(bpy.data, name):
+                if id_data.users or id_data.use_fake_user:
+                    continue
+                if users_before.get(id_data, 1) == 0:
+                    continue
+                orphans.append(id_data)
+                freed[name] += 1
+                freed_bytes += estimate_id_bytes(id_data)
+        if not orphans:
+            break
+        bpy.data.batch_remove(orphans)
+
+    return freed, freed_bytes
+
+
 def select_objects(objects):
     for obj in objects:
         obj.select_set(True)
@@ -148,21 +1248,487 @@ def selection_by_name(names):
     return selected
 
 
-@change_mouse_cursor
-def clean_DAE(self, context):
-    orig_verts = 0
-    new_verts = 0
+#############################################
+# CACHE
+############################################
+# settings that do not change the cleaned geometry
+SETTINGS_HASH_IGNORE = {
+    "rna_type",
+    "dc_cache_bool",
+    "dc_cache_dir",
+    "dc_cache_size_int",
+    "dc_report_path",
+    "dc_cprofile_bool",
+    "dc_report_slowest_int",
+    "dc_force_bool",
+    "dc_purge_orphans_bool",
+    "dc_no_undo_bool",
+    "dc_shard_jobs_int",
+    "dc_checkpoint_dir",
+    "dc_last_checkpoint",
+}
+
+ARRAY_KEYS = (
+    "co", "loop_verts", "loop_starts", "loop_totals",
+    "material_index", "use_smooth", "loose_edges",
+)
+
+
+def settings_hash(settings):
+    values = [
+        (prop.identifier, getattr(settings, prop.identifier))
+        for prop in settings.bl_rna.properties
+        if prop.identifier not in SETTINGS_HASH_IGNORE
+    ]
+    return hashlib.sha1(repr(sorted(values)).encode()).hexdigest()
+
+
+def geometry_hash(arrays, extra=b""):
+    h = hashlib.sha1()
+    for key in ARRAY_KEYS:
+        h.update(np.ascontiguousarray(arrays[key]).tobytes())
+    for name, uv in arrays["uvs"]:
+        h.update(name.encode())
+        h.update(np.ascontiguousarray(uv).tobytes())
+    h.update(extra)
+    return h.hexdigest()
+
+
+def cache_directory(settings):
+    if settings.dc_cache_dir:
+        return bpy.path.abspath(settings.dc_cache_dir)
+    return os.path.join(tempfile.gettempdir(), "daeclean_cache")
+
+
+def cache_load(directory, key):
+    path = os.path.join(directory, key + ".npz")
+    try:
+        with np.load(path) as data:
+            arrays = {k: data[k] for k in ARRAY_KEYS}
+            arrays["uvs"] = [
+                (str(name), data["uv_%s" % i]) for i, name in enumerate(data["uv_names"])
+            ]
+    except (OSError, KeyError, ValueError):
+        return None
+    # mark as recently used for eviction
+    os.utime(path)
+    return arrays
+
+
+def cache_save(directory, key, arrays):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, key + ".npz")
+    data = {k: arrays[k] for k in ARRAY_KEYS}
+    data["uv_names"] = np.array([name for name, _uv in arrays["uvs"]], dtype=str)
+    for i, (_name, uv) in enumerate(arrays["uvs"]):
+        data["uv_%s" % i] = uv
+    # write then rename so a crash never leaves a half written entry
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(f, **data)
+    os.replace(tmp_path, path)
+
+
+def cache_evict(directory, max_bytes):
+    """Deletes the least recently used entries until the cache fits in max_bytes"""
+    try:
+        entries = [e for e in os.scandir(directory) if e.name.endswith(".npz")]
+    except OSError:
+        return
+    entries = sorted(((e.stat().st_mtime, e.stat().st_size, e.path) for e in entries))
+    total = sum(size for _mtime, size, _path in entries)
+    for _mtime, size, path in entries:
+        if total <= max_bytes:
+            break
+        os.remove(path)
+        total -= size
+
+
+# mesh attributes the cached arrays carry, besides UV maps
+CACHED_ATTRIBUTES = {"position", "material_index", "sharp_face"}
+
+
+def cache_safe(mesh, objs, b_rem_csn):
+    """Whether a cached result would keep everything of mesh. The cache only
+    stores geometry, material indices, smooth flags and UV maps, custom
+    normals are fine when the clean clears them anyway"""
+    if (mesh.has_custom_normals and not b_rem_csn) or len(mesh.color_attributes):
+        return False
+    if any(obj.vertex_groups for obj in objs):
+        return False
+    uv_names = {layer.name for layer in mesh.uv_layers}
+    for attr in mesh.attributes:
+        if not (attr.name.startswith(".") or attr.name in uv_names
+                or attr.name in CACHED_ATTRIBUTES):
+            return False
+    for flag in ("use_seam", "use_edge_sharp"):
+        values = np.empty(len(mesh.edges), dtype=bool)
+        mesh.edges.foreach_get(flag, values)
+        if values.any():
+            return False
+    return True
+
+
+def transform_key(obj):
+    """Matrices that decide what applying the transform of obj bakes into
+    its mesh. Parents are applied first and their children put back, which
+    changes the child's basis, so every ancestor is part of it"""
+    parts = []
+    while obj is not None:
+        parts.append(np.array(obj.matrix_basis, dtype=np.float32).tobytes())
+        parts.append(np.array(obj.matrix_parent_inverse, dtype=np.float32).tobytes())
+        obj = obj.parent
+    return b"".join(parts)
+
+
+def cache_lookup(selected, directory, s_hash, b_apl_trans, b_rem_csn, context):
+    """Swaps cached results into the meshes of selected.
+    Returns the objects still to clean and the cache key of each of their
+    meshes. Meshes with layers the cache does not store are never looked up
+    or stored. Hits with applied transforms keep their children in place,
+    like apply_transforms_bulk"""
+    misses = []
+    keys = {}
+    levels = {}
+    for mesh, objs in group_by_mesh(selected).items():
+        # layers the cache does not store would be lost, clean these normally
+        if not cache_safe(mesh, objs, b_rem_csn):
+            misses.extend(objs)
+            continue
+
+        # applied transforms end up in the geometry, so they are part of the key,
+        # apply_transforms leaves shared meshes alone
+        b_apl_trans_mesh = b_apl_trans and mesh.users == 1
+        extra = s_hash.encode()
+        if b_apl_trans_mesh:
+            extra += transform_key(objs[0])
+        key = geometry_hash(mesh_to_arrays(mesh), extra)
+
+        arrays = cache_load(directory, key)
+        if arrays is None:
+            keys[mesh] = key
+            misses.extend(objs)
+            continue
+
+        if not b_apl_trans_mesh:
+            arrays_to_mesh(mesh, arrays)
+            continue
+        levels.setdefault(object_depth(objs[0]), []).append((objs[0], arrays))
+
+    # parents first, the keys above were taken before any transform changed
+    for depth in sorted(levels):
+        level = levels[depth]
+        children = [(c, c.matrix_world.copy()) for obj, _arrays in level for c in obj.children]
+
+        for obj, arrays in level:
+            arrays_to_mesh(obj.data, arrays)
+            obj.matrix_basis.identity()
+
+        context.view_layer.update()
+        for child, world in children:
+            child.matrix_world = world
+        if children:
+            context.view_layer.update()
+
+    return misses, keys
+
+
+#############################################
+# DIRTY TRACKING
+############################################
+STAMP_PROP = "dc_clean_stamp"
+
+
+def mesh_stamp(mesh, s_hash):
+    return "%s:%s" % (geometry_hash(mesh_to_arrays(mesh)), s_hash)
+
+
+def stamp_meshes(selected, s_hash):
+    """Records on each mesh that it was cleaned with these settings"""
+    for mesh in group_by_mesh(selected):
+        mesh[STAMP_PROP] = mesh_stamp(mesh, s_hash)
+
+
+def dirty_objects(selected, s_hash, b_apl_trans):
+    """Objects whose mesh changed, or was cleaned with other settings, since
+    it was last stamped"""
+    dirty = []
+    for mesh, objs in group_by_mesh(selected).items():
+        stamp = mesh.get(STAMP_PROP)
+        if not stamp or stamp != mesh_stamp(mesh, s_hash):
+            dirty.extend(objs)
+            continue
+        # a moved object still needs its transform applied
+        if b_apl_trans and mesh.users == 1 and objs[0].matrix_basis != Matrix.Identity(4):
+            dirty.extend(objs)
+    return dirty
+
+
+#############################################
+# CHECKPOINT
+############################################
+def checkpoint_path(context):
+    directory = bpy.path.abspath(context.scene.dc_settings.dc_checkpoint_dir)
+    if not directory:
+        directory = tempfile.gettempdir()
+    return os.path.join(directory, "daeclean_checkpoint_%s.blend" % bpy.path.clean_name(context.scene.name))
+
+
+# data the checkpoint shares with the scene, remapped to what is there on restore
+CHECKPOINT_SHARED = ("materials", "images", "node_groups", "textures")
+
+
+def checkpoint_info_path(path):
+    return os.path.splitext(path)[0] + ".json"
+
+
+def collection_names(obj):
+    """Collections obj is in, "" for a scene's master collection"""
+    return [c.name if bpy.data.collections.get(c.name) is c else ""
+            for c in obj.users_collection]
+
+
+def write_checkpoint(objects, path):
+    """Saves objects and the data they use to a compressed .blend, and their
+    collections to a .json beside it.
+    Unlike an undo step this scales with the selection, not the scene"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    bpy.data.libraries.write(path, set(objects), compress=True)
+    info = {
+        "collections": {obj.name: collection_names(obj) for obj in objects},
+        "existing": [obj.name for obj in bpy.data.objects],
+        "created": [],
+    }
+    with open(checkpoint_info_path(path), "w") as f:
+        json.dump(info, f)
+
+
+def record_created(path):
+    """Notes the objects made since write_checkpoint, so restoring removes them"""
+    with open(checkpoint_info_path(path)) as f:
+        info = json.load(f)
+    existing = set(info["existing"])
+    info["created"] = [obj.name for obj in bpy.data.objects if obj.name not in existing]
+    with open(checkpoint_info_path(path), "w") as f:
+        json.dump(info, f)
+
+
+def restore_checkpoint(context, path):
+    """Brings back the objects saved by write_checkpoint.
+    Objects the run created are removed. Objects that still exist get their
+    mesh data, transform and parent back, objects removed since (joined or
+    deleted) are linked into their collections again. Materials and images
+    still in the scene are reused rather than appended again.
+    Returns the number of objects restored and recreated"""
+    info = {}
+    if os.path.exists(checkpoint_info_path(path)):
+        with open(checkpoint_info_path(path)) as f:
+            info = json.load(f)
+
+    created = [bpy.data.objects[name] for name in info.get("created", [])
+               if name in bpy.data.objects]
+    replaced = {obj.data for obj in created if obj.data is not None}
+    delete_objects(created)
+
+    # shared data is requested by name in the same append as the objects, so
+    # the objects use these copies and each copy's name in the file is known
+    with bpy.data.libraries.load(path, link=False) as (data_from, data_to):
+        names = list(data_from.objects)
+        data_to.objects = names
+        shared = {attr: list(getattr(data_from, attr)) for attr in CHECKPOINT_SHARED}
+        for attr, ids in shared.items():
+            setattr(data_to, attr, list(ids))
+
+    duplicates = []
+    for attr, ids in shared.items():
+        existing_ids = getattr(bpy.data, attr)
+        for name, appended in zip(ids, getattr(data_to, attr)):
+            existing = existing_ids.get(name)
+            if appended is None or existing is None or existing is appended:
+                continue
+            appended.user_remap(existing)
+            duplicates.append(appended)
+
+    # appended copies of objects that still exist are only used for their data
+    originals = {}
+    copies = []
+    recreated = []
+    for name, saved in zip(names, data_to.objects):
+        if saved is None:
+            continue
+        current = bpy.data.objects.get(name)
+        if current is not None and current is not saved:
+            originals[saved] = current
+            copies.append(saved)
+        else:
+            originals[saved] = saved
+            recreated.append(saved)
+
+    for saved, current in originals.items():
+        if current is saved:
+            continue
+        if current.type == saved.type:
+            if current.data is not None:
+                replaced.add(current.data)
+            current.data = saved.data
+        current.matrix_basis = saved.matrix_basis
+        current.matrix_parent_inverse = saved.matrix_parent_inverse
+
+    for saved, current in originals.items():
+        if saved.parent is not None:
+            current.parent = originals.get(saved.parent, saved.parent)
+            current.matrix_parent_inverse = saved.matrix_parent_inverse
+
+    for obj in recreated:
+        collections = [bpy.data.collections.get(name) if name else context.scene.collection
+                       for name in info.get("collections", {}).get(obj.name, [""])]
+        collections = [c for c in collections if c is not None] or [context.scene.collection]
+        for collection in collections:
+            collection.objects.link(obj)
+
+    delete_objects(copies + duplicates)
+    # meshes the run made or cleaned that nothing uses any more
+    delete_objects([data for data in replaced if not data.users])
+    return len(copies), len(recreated)
+
+
+#############################################
+# SHARDS
+############################################
+# settings the main process already handled before sharding
+SHARD_OVERRIDES = {
+    "dc_loose_face_bool": False,
+    "dc_link_instances_bool": False,
+    "dc_apply_transforms": False,
+    "dc_camera_del_bool": False,
+    "dc_purge_orphans_bool": False,
+    "dc_force_bool": True,
+    "dc_report_path": "",
+    "dc_cprofile_bool": False,
+    "dc_no_undo_bool": False,
+    "dc_dedup_materials_bool": False,
+}
+
+
+def partition_shards(objects, count):
+    """Splits objects into at most count shards of similar vertex totals,
+    largest first onto the lightest shard. Returns lists of objects"""
+    heap = [(0, i, []) for i in range(min(count, len(objects)))]
+    for obj in sorted(objects, key=lambda o: len(o.data.vertices), reverse=True):
+        verts, i, shard = heapq.heappop(heap)
+        shard.append(obj)
+        heapq.heappush(heap, (verts + len(obj.data.vertices), i, shard))
+    return [shard for _verts, _i, shard in sorted(heap, key=lambda x: x[1])]
+
+
+def settings_preset(settings):
+    """DCSettings as a preset for dae_batch workers"""
+    preset = {}
+    for key in settings.bl_rna.properties.keys():
+        if key == "rna_type":
+            continue
+        value = getattr(settings, key)
+        if isinstance(value, (bool, int, float, str)):
+            preset[key] = value
+    preset.update(SHARD_OVERRIDES)
+    return preset
+
+
+def write_shard(objects, path):
+    """Writes the meshes of objects to path in a scene of their own.
+    Unparented copies keep each object's world transform, so cleaning that
+    depends on it, like box projection, gives the same result"""
+    scene = bpy.data.scenes.new("DAEClean Shard")
+    copies = []
+    for obj in objects:
+        copy = bpy.data.objects.new(obj.name, obj.data)
+        copy.matrix_world = obj.matrix_world.copy()
+        scene.collection.objects.link(copy)
+        copies.append(copy)
+    try:
+        bpy.data.libraries.write(path, {scene}, compress=False)
+    finally:
+        bpy.data.batch_remove(copies)
+        bpy.data.scenes.remove(scene)
+
+
+def merge_shard(path, names):
+    """Swaps the meshes called names for their cleaned copies in path.
+    Materials stay the ones the original meshes used, slot by slot.
+    Returns the cleaned meshes swapped in"""
+    # users of each kind are dropped before the next is checked
+    collections = (bpy.data.materials, bpy.data.node_groups, bpy.data.textures, bpy.data.images)
+    before = [set(c) for c in collections]
+
+    with bpy.data.libraries.load(path, link=False) as (data_from, data_to):
+        wanted = [name for name in data_from.meshes if name in names]
+        data_to.meshes = list(wanted)
+
+    swapped = []
+    # appended meshes are renamed on clashes, so match them by request order
+    for name, mesh in zip(wanted, data_to.meshes):
+        original = bpy.data.meshes.get(name)
+        if mesh is None or original is None or original is mesh:
+            continue
+        for i, material in enumerate(original.materials):
+            if i < len(mesh.materials):
+                mesh.materials[i] = material
+        original.user_remap(mesh)
+        bpy.data.meshes.remove(original)
+        mesh.name = name
+        swapped.append(mesh)
+
+    # materials and images that came along with the cleaned meshes
+    for collection, ids in zip(collections, before):
+        delete_objects([i for i in collection if i not in ids and not i.users])
+    return swapped
+
+
+def clean_shards(selected, context, jobs, profile=None):
+    """Cleans the meshes of selected in jobs background Blender processes.
+    Returns (shards, failed shards, cleaned meshes)"""
+    profile = profile or RunProfile()
+    dae_batch = sibling_module("dae_batch")
+
+    objects = unique_mesh_objects(selected)
+    shards = partition_shards(objects, jobs)
+    with tempfile.TemporaryDirectory() as tmp:
+        preset_path = os.path.join(tmp, "preset.json")
+        with open(preset_path, "w") as f:
+            json.dump(settings_preset(context.scene.dc_settings), f)
+
+        files = []
+        with profile.stage("write shards", objects):
+            for i, shard in enumerate(shards):
+                path = os.path.join(tmp, "shard_%03d.blend" % i)
+                write_shard(shard, path)
+                files.append(path)
+
+        out_dir = os.path.join(tmp, "cleaned")
+        with profile.stage("clean shards", objects):
+            results = dae_batch.run_batch(
+                files, out_dir, preset_path, "blend", len(files), bpy.app.binary_path)
+
+        failed = 0
+        swapped = []
+        with profile.stage("merge shards", objects):
+            by_input = {r["input"]: r for r in results}
+            for path, shard in zip(files, shards):
+                if not by_input.get(os.path.abspath(path), {}).get("ok"):
+                    failed += 1
+                    continue
+                swapped.extend(merge_shard(os.path.join(out_dir, os.path.basename(path)),
+                                           {obj.data.name for obj in shard}))
+    return len(shards), failed, swapped
 
-    b_remd = context.scene.dc_settings.dc_rem_doubles_bool
-    b_limd = context.scene.dc_settings.dc_limited_disolve_bool
-    b_limd_mat = context.scene.dc_settings.dc_limited_disolve_material_bool
-    b_triq = context.scene.dc_settings.dc_tri_quad_bool
-    b_joinl = context.scene.dc_settings.dc_loose_face_bool
-    b_delc = context.scene.dc_settings.dc_camera_del_bool
-    f_rdtol = context.scene.dc_settings.dc_rem_d_tol_float
-    b_auto_smt = context.scene.dc_settings.dc_rem_auto_smooth_norms_bool
-    b_rem_csn = context.scene.dc_settings.dc_rem_custom_split_normals
-    b_apl_trans = context.scene.dc_settings.dc_apply_transforms
+
+@change_mouse_cursor
+def clean_DAE_sharded(self, context):
+    """clean_DAE with the mesh clean spread over background Blender processes.
+    Joining, instancing and transforms run here first since they need the
+    whole scene"""
+    settings = context.scene.dc_settings
+    jobs = settings.dc_shard_jobs_int or os.cpu_count() or 1
 
     if context.mode == "EDIT_MESH":
         bpy.ops.object.mode_set(mode="OBJECT")
@@ -171,77 +1737,980 @@ def clean_DAE(self, context):
         self.report({"INFO"}, "No Objects Selected")
         return
 
+    profile = RunProfile(settings.dc_report_slowest_int)
+    id_users = id_user_snapshot() if settings.dc_purge_orphans_bool else None
     cams = [obj for obj in context.selected_objects if obj.type == "CAMERA"]
-
-    # join loose faces
-    if b_joinl:
-        selected = join_loose_faces(
-            context, [obj.name for obj in context.selected_objects])
+    s_hash = settings_hash(settings)
+
+    if settings.dc_dedup_materials_bool:
+        with profile.stage("dedup materials"):
+            dedup_stats(profile, dedup_materials(context.selected_objects))
+
+    if settings.dc_loose_face_bool:
+        scope = join_scope(context)
+        before = mesh_counts(scope)
+        start = time.perf_counter()
+        selected = join_selection(context)
+        profile.record("join", time.perf_counter() - start, len(scope),
+                       before, mesh_counts(scope + selected))
     else:
         selected = context.selected_objects
-
     selected = [obj for obj in selected if obj.type == "MESH"]
 
-    for obj in selected:
-        orig_verts += len(obj.data.vertices)
-        # must deselect all for uv unwrapping to work
-        obj.select_set(False)
+    if not settings.dc_force_bool:
+        count = len(selected)
+        with profile.stage("dirty check", selected):
+            selected = dirty_objects(selected, s_hash, settings.dc_apply_transforms)
+        profile.count("unchanged skipped", count - len(selected))
 
-    # Remove Doubles
-    if b_remd:
-        remove_doubles(selected, f_rdtol)
+    if instances_wanted(settings):
+        with profile.stage("link instances", selected):
+            profile.count("instances linked", link_instances(selected, settings.dc_rem_d_tol_float))
 
-    # Apply all transforms
-    if b_apl_trans:
-        apply_transforms(selected, context)
+    deselect_all(context)
+    if settings.dc_apply_transforms:
+        if settings.dc_shared_transforms_enum == "SINGLE_USER":
+            make_single_user(selected)
+        with profile.stage("apply transforms", selected):
+            if settings.dc_transform_method_enum == "NUMPY":
+                apply_transforms_bulk(selected, context)
+            else:
+                apply_transforms(selected, context)
+
+    orig_verts, _faces = mesh_counts(selected)
+    shards, failed, cleaned = (
+        clean_shards(selected, context, jobs, profile) if selected else (0, 0, []))
+    profile.count("shards", shards)
+    profile.count("shards failed", failed)
+    new_verts, _faces = mesh_counts(selected)
+
+    # workers stamp with their own settings, stamp again with ours, meshes
+    # of failed shards were never cleaned so they stay unstamped
+    cleaned = set(cleaned)
+    with profile.stage("stamp"):
+        stamp_meshes([obj for obj in selected if obj.data in cleaned], s_hash)
+
+    if settings.dc_camera_del_bool:
+        with profile.stage("camera delete", cams):
+            delete_objects(cams)
 
-    # deselect all
     deselect_all(context)
 
-    # apply transformations to individual objects
+    if id_users is not None:
+        with profile.stage("purge orphans"):
+            freed, freed_bytes = purge_orphans(id_users)
+        profile.count("datablocks purged", sum(freed.values()))
+        profile.count("bytes purged", freed_bytes)
+
+    last_report.clear()
+    last_report.update(profile.as_dict())
+    s_report = bpy.path.abspath(settings.dc_report_path)
+    if s_report:
+        profile.write(s_report)
+
+    self.report({"WARNING" if failed else "INFO"},
+                "Doubles removed:%s Time:%.2fs Shards:%s Failed:%s" % (
+                    orig_verts - new_verts, last_report["total_time"], shards, failed))
+
+
+#############################################
+# PROFILING
+############################################
+# report of the last run, shown in the Last Run panel
+last_report = {}
+
+
+def mesh_counts(objects):
+    """Vertex and face totals of the unique meshes of objects, also in edit mode"""
+    meshes = {}
+    for obj in objects:
+        try:
+            if obj.type == "MESH":
+                meshes[obj.data] = obj
+        except ReferenceError:
+            # removed by a join or delete during the stage
+            continue
+
+    verts = 0
+    faces = 0
+    for obj in meshes.values():
+        if obj.mode == "EDIT":
+            bm = bmesh.from_edit_mesh(obj.data)
+            verts += len(bm.verts)
+            faces += len(bm.faces)
+        else:
+            verts += len(obj.data.vertices)
+            faces += len(obj.data.polygons)
+    return verts, faces
+
+
+class RunProfile:
+    """Collects stage timings, mesh sizes and the slowest objects of a run"""
+
+    def __init__(self, slowest=10):
+        self.slowest = slowest
+        self.start_time = time.perf_counter()
+        self.stages = {}
+        self.objects = []
+        self.counters = {}
+        self.meshes = {}
+        self._object_start = 0.0
+
+    @contextmanager
+    def stage(self, name, objects=()):
+        """Times the enclosed block, stages run more than once are summed"""
+        before = mesh_counts(objects)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, len(objects),
+                        before, mesh_counts(objects))
+
+    def record(self, name, elapsed, n_objects, before, after):
+        """Adds time and (verts, faces) counts to a stage, for stages timed in
+        parts that should count their meshes once"""
+        record = self.stages.setdefault(name, {
+            "stage": name, "time": 0.0, "objects": 0,
+            "verts_before": 0, "verts_after": 0,
+            "faces_before": 0, "faces_after": 0,
+        })
+        record["time"] += elapsed
+        record["objects"] += n_objects
+        record["verts_before"] += before[0]
+        record["verts_after"] += after[0]
+        record["faces_before"] += before[1]
+        record["faces_after"] += after[1]
+
+    def object_start(self):
+        self._object_start = time.perf_counter()
+
+    def object_end(self, stage, item):
+        """Records the time since object_start against an object or mesh"""
+        self.objects.append((time.perf_counter() - self._object_start, stage, item.name))
+
+    def count(self, name, value):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def mesh_stat(self, mesh, name, value):
+        """Adds value to a per mesh figure, e.g. bytes saved"""
+        stats = self.meshes.setdefault(mesh.name, {})
+        stats[name] = stats.get(name, 0) + value
+
+    def as_dict(self):
+        slowest = sorted(self.objects, reverse=True)[:self.slowest]
+        return {
+            "total_time": time.perf_counter() - self.start_time,
+            "stages": list(self.stages.values()),
+            "counters": dict(self.counters),
+            "meshes": dict(self.meshes),
+            "slowest_objects": [
+                {"name": name, "stage": stage, "time": elapsed}
+                for elapsed, stage, name in slowest
+            ],
+        }
+
+    def write(self, path):
+        with open(path, "w") as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+
+def clean_mesh_ops(b_triq, b_limd, b_limd_mat, b_rem_csn, b_smart_uv,
+                   b_recalc=True, objects=(), profile=None):
+    """Runs the mesh cleaning operators on everything currently in edit mode"""
+    profile = profile or RunProfile()
+    bpy.ops.mesh.select_all(action="SELECT")
+    # Tris To Quads
+    if b_triq:
+        with profile.stage("tris to quads", objects):
+            bpy.ops.mesh.tris_convert_to_quads()
+    # Limited Dissolve
+    if b_limd:
+        with profile.stage("limited dissolve", objects):
+            bpy.ops.mesh.dissolve_limited(delimit={return_l_dissolve_setting(b_limd_mat)})
+    # Clear custom split normals
+    if b_rem_csn:
+        with profile.stage("custom normals", objects):
+            bpy.ops.mesh.customdata_custom_splitnormals_clear()
+    # UV Unwrap
+    if b_smart_uv:
+        with profile.stage("uv unwrap", objects):
+            bpy.ops.uv.smart_project()
+    # Recalc normals
+    if b_recalc:
+        with profile.stage("recalc normals", objects):
+            bpy.ops.mesh.normals_make_consistent(inside=False)
+
+
+def auto_smooth(objects, context):
+    """Runs the auto smooth step of the clean engines on objects"""
+    if not objects:
+        return
+    deselect_all(context)
+    select_objects(objects)
+    context.view_layer.objects.active = objects[0]
+    bpy.ops.object.shade_auto_smooth(use_auto_smooth=False)
+    deselect_all(context)
+
+
+def clean_per_object(selected, context, options, b_auto_smt, profile=None):
+    """Cleans one object per edit session. Returns the objects that failed"""
+    profile = profile or RunProfile()
+    failed = []
     for obj in selected:
+        profile.object_start()
         obj.select_set(True)
         context.view_layer.objects.active = obj
 
         # Mesh Clean
         bpy.ops.object.mode_set(mode="EDIT")
-        bpy.ops.mesh.select_all(action="SELECT")
         try:
-            # Tris To Quads
-            if b_triq:
-                bpy.ops.mesh.tris_convert_to_quads()
-            # Limited Dissolve
-            if b_limd:
-                bpy.ops.mesh.dissolve_limited(delimit={return_l_dissolve_setting(b_limd_mat)})
-            # Clear custom split normals
-            if b_rem_csn:
-                bpy.ops.mesh.customdata_custom_splitnormals_clear()
-            # UV Unwrap
-            bpy.ops.uv.smart_project()
-            # Recalc normals
-            bpy.ops.mesh.normals_make_consistent(inside=False)
-
-            new_verts += len(obj.data.vertices)
+            clean_mesh_ops(*options, objects=[obj], profile=profile)
         except Exception as e:
             print(e)
             print("Unable to clean object: " + obj.name)
+            failed.append(obj)
 
         # Switch back to Object mode
         bpy.ops.object.mode_set(mode="OBJECT")
 
         # Auto-smooth normals
         if b_auto_smt:
-            bpy.ops.object.shade_auto_smooth(use_auto_smooth=False)
+            with profile.stage("auto smooth", [obj]):
+                bpy.ops.object.shade_auto_smooth(use_auto_smooth=False)
 
         obj.select_set(False)
+        profile.object_end("mesh clean", obj)
+    return failed
 
-    if b_delc:
-        select_objects(cams)
-        bpy.ops.object.delete()
+
+def clean_batched(selected, context, options, b_auto_smt, profile=None):
+    """Cleans all objects in one multi-object edit session.
+    If the session fails the objects are split in half and retried, so only
+    the objects that actually fail end up on the per-object path.
+    Returns the objects that failed there too"""
+    profile = profile or RunProfile()
+    if not selected:
+        return []
+    if len(selected) == 1:
+        return clean_per_object(selected, context, options, b_auto_smt, profile)
 
     deselect_all(context)
+    select_objects(selected)
+    context.view_layer.objects.active = selected[0]
+
+    bpy.ops.object.mode_set(mode="EDIT")
+    try:
+        clean_mesh_ops(*options, objects=selected, profile=profile)
+        failed = False
+    except Exception as e:
+        print(e)
+        failed = True
+    bpy.ops.object.mode_set(mode="OBJECT")
+
+    if failed:
+        deselect_all(context)
+        half = len(selected) // 2
+        return (clean_batched(selected[:half], context, options, b_auto_smt, profile)
+                + clean_batched(selected[half:], context, options, b_auto_smt, profile))
+
+    # Auto-smooth normals
+    if b_auto_smt:
+        with profile.stage("auto smooth", selected):
+            bpy.ops.object.shade_auto_smooth(use_auto_smooth=False)
+
+    deselect_all(context)
+    return []
+
+
+def clean_bmesh(selected, context, options, b_auto_smt, rem_d_tol, profile=None):
+    """Cleans each unique mesh with bmesh.ops instead of the edit mode operators.
+    rem_d_tol is None when doubles should be kept.
+    Returns the objects whose mesh failed, those are left as they were"""
+    profile = profile or RunProfile()
+    b_triq, b_limd, b_limd_mat, b_rem_csn, b_smart_uv, b_recalc = options
+    meshes = set(o.data for o in selected)
+    failed_meshes = set()
+
+    bm = bmesh.new()
+
+    with profile.stage("bmesh clean", selected):
+        for m in meshes:
+            profile.object_start()
+            bm.from_mesh(m)
+            try:
+                # Remove Doubles
+                if rem_d_tol is not None:
+                    bmesh.ops.remove_doubles(bm, verts=bm.verts, dist=rem_d_tol)
+                # Tris To Quads, thresholds match the tris_convert_to_quads defaults
+                if b_triq:
+                    bmesh.ops.join_triangles(
+                        bm, faces=bm.faces,
+                        angle_face_threshold=radians(40),
+                        angle_shape_threshold=radians(40))
+                # Limited Dissolve, angle matches the dissolve_limited default
+                if b_limd:
+                    bmesh.ops.dissolve_limited(
+                        bm, angle_limit=radians(5),
+                        verts=bm.verts, edges=bm.edges,
+                        delimit={return_l_dissolve_setting(b_limd_mat)})
+                # Recalc normals
+                if b_recalc:
+                    bmesh.ops.recalc_face_normals(bm, faces=bm.faces)
+                bm.to_mesh(m)
+                m.update()
+            except Exception as e:
+                print(e)
+                print("Unable to clean mesh: " + m.name)
+                failed_meshes.add(m)
+            bm.clear()
+            profile.object_end("bmesh clean", m)
+    bm.free()
+
+    # Clear custom split normals
+    if b_rem_csn:
+        with profile.stage("custom normals", selected):
+            clear_custom_split_normals(selected, context)
+
+    # UV Unwrap, still needs the operator but only one edit session
+    deselect_all(context)
+    select_objects(selected)
+    context.view_layer.objects.active = selected[0]
+    if b_smart_uv:
+        with profile.stage("uv unwrap", selected):
+            bpy.ops.object.mode_set(mode="EDIT")
+            bpy.ops.mesh.select_all(action="SELECT")
+            try:
+                bpy.ops.uv.smart_project()
+            except Exception as e:
+                print(e)
+            bpy.ops.object.mode_set(mode="OBJECT")
+
+    # Auto-smooth normals
+    if b_auto_smt:
+        with profile.stage("auto smooth", selected):
+            bpy.ops.object.shade_auto_smooth(use_auto_smooth=False)
+
+    deselect_all(context)
+    return [obj for obj in selected if obj.data in failed_meshes]
+
+
+def box_project(selected, texel_scale):
+    """Projects UVs from the world axis each face points along most.
+    Linear in face count, meant for mostly axis aligned architecture.
+    Shared meshes are projected from the first object using them"""
+    for obj in unique_mesh_objects(selected):
+        mesh = obj.data
+        n_polys = len(mesh.polygons)
+        if not n_polys:
+            continue
+        mat = np.array(obj.matrix_world, dtype=np.float64)
+
+        co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", co)
+        co = co.reshape(-1, 3) @ mat[:3, :3].T + mat[:3, 3]
+        normals = np.empty(n_polys * 3, dtype=np.float32)
+        mesh.polygons.foreach_get("normal", normals)
+        normals = normals.reshape(-1, 3) @ np.linalg.inv(mat[:3, :3])
+        loop_verts = np.empty(len(mesh.loops), dtype=np.int32)
+        mesh.loops.foreach_get("vertex_index", loop_verts)
+        loop_totals = np.empty(n_polys, dtype=np.int32)
+        mesh.polygons.foreach_get("loop_total", loop_totals)
+
+        # dominant axis of each face, and whether it faces down that axis
+        axis = np.abs(normals).argmax(axis=1)
+        facing = np.sign(normals[np.arange(n_polys), axis])
+        axis = np.repeat(axis, loop_totals)
+        facing = np.repeat(np.where(facing == 0, 1, facing), loop_totals)
+
+        pos = co[loop_verts]
+        # X faces map (y, z), Y faces (x, z), Z faces (x, y)
+        u_axis = np.where(axis == 0, 1, 0)
+        v_axis = np.where(axis == 2, 1, 2)
+        rows = np.arange(len(pos))
+        # mirror u on the far side so textures do not read backwards
+        flip = np.where(axis == 1, -facing, facing)
+        uv = np.stack([pos[rows, u_axis] * flip, pos[rows, v_axis]], axis=1) * texel_scale
+
+        layer = mesh.uv_layers.active or mesh.uv_layers.new(name="UVMap")
+        layer.data.foreach_set("uv", uv.astype(np.float32).ravel())
+
+
+#############################################
+# NORMALS
+############################################
+# corner attribute types that are permuted when faces are flipped
+CORNER_ATTRIBUTE_KEYS = {
+    "FLOAT": ("value", 1, np.float32),
+    "INT": ("value", 1, np.int32),
+    "BOOLEAN": ("value", 1, bool),
+    "FLOAT2": ("vector", 2, np.float32),
+    "FLOAT_VECTOR": ("vector", 3, np.float32),
+    "FLOAT_COLOR": ("color", 4, np.float32),
+    "BYTE_COLOR": ("color", 4, np.float32),
+}
+
+
+def face_adjacency(loop_edges, loop_forward, n_polys, loop_poly):
+    """Face adjacency across manifold edges in CSR form.
+    Returns (indptr, neighbours, parity) where parity is True when the two
+    faces wind the shared edge the same way, so one of them is flipped
+    relative to the other. Edges with more than two faces are not crossed"""
+    order = np.argsort(loop_edges, kind="stable")
+    edges = loop_edges[order]
+    first = np.flatnonzero(np.r_[True, edges[1:] != edges[:-1]])
+    counts = np.diff(np.r_[first, len(edges)])
+    pairs = first[counts == 2]
+
+    a = order[pairs]
+    b = order[pairs + 1]
+    src = np.concatenate([loop_poly[a], loop_poly[b]])
+    dst = np.concatenate([loop_poly[b], loop_poly[a]])
+    parity = np.tile(loop_forward[a] == loop_forward[b], 2)
+
+    order = np.argsort(src, kind="stable")
+    indptr = np.zeros(n_polys + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n_polys), out=indptr[1:])
+    return indptr, dst[order], parity[order]
+
+
+def face_components(indptr, neighbours):
+    """Connected component label of each face, the lowest face index in it"""
+    n = len(indptr) - 1
+    src = np.repeat(np.arange(n), np.diff(indptr))
+    label = np.arange(n)
+    while True:
+        # hook each root onto the lowest root next to it, then flatten
+        new = label.copy()
+        np.minimum.at(new, label[src], label[neighbours])
+        while True:
+            jumped = new[new]
+            if np.array_equal(jumped, new):
+                break
+            new = jumped
+        if np.array_equal(new, label):
+            return label
+        label = new
+
+
+def propagate_winding(indptr, neighbours, parity, seeds):
+    """Breadth first flood from every seed at once, one level per pass.
+    Returns whether each face must be flipped to match its component's seed"""
+    n = len(indptr) - 1
+    flip = np.zeros(n, dtype=bool)
+    visited = np.zeros(n, dtype=bool)
+    visited[seeds] = True
+    frontier = seeds
+    while len(frontier):
+        starts = indptr[frontier]
+        totals = indptr[frontier + 1] - starts
+        origin = np.repeat(frontier, totals)
+        idx = np.repeat(starts - np.cumsum(totals) + totals, totals) + np.arange(totals.sum())
+
+        faces = neighbours[idx]
+        new = ~visited[faces]
+        faces, first = np.unique(faces[new], return_index=True)
+        flip[faces] = flip[origin[new][first]] ^ parity[idx[new][first]]
+        visited[faces] = True
+        frontier = faces
+    return flip
+
+
+def orient_mesh(mesh):
+    """Makes the winding of each connected part of mesh consistent and points it
+    outward, like normals_make_consistent(inside=False) but on arrays.
+    Returns the number of faces flipped"""
+    n_polys = len(mesh.polygons)
+    if not n_polys:
+        return 0
+    arrays = mesh_to_arrays(mesh)
+    co = arrays["co"].astype(np.float64)
+    loop_verts = arrays["loop_verts"]
+    loop_starts = arrays["loop_starts"]
+    loop_totals = arrays["loop_totals"]
+    n_loops = len(loop_verts)
+
+    loop_edges = np.empty(n_loops, dtype=np.int32)
+    mesh.loops.foreach_get("edge_index", loop_edges)
+    edge_verts = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get("vertices", edge_verts)
+    loop_forward = edge_verts.reshape(-1, 2)[loop_edges, 0] == loop_verts
+
+    loop_poly = np.repeat(np.arange(n_polys), loop_totals)
+    indptr, neighbours, parity = face_adjacency(loop_edges, loop_forward, n_polys, loop_poly)
+    component = face_components(indptr, neighbours)
+    seeds = np.flatnonzero(component == np.arange(n_polys))
+    flip = propagate_winding(indptr, neighbours, parity, seeds)
+
+    # signed volume of each component around its own centre, fan triangulated
+    pos = np.arange(n_loops) - loop_starts[loop_poly]
+    fan = np.flatnonzero((pos >= 1) & (pos < loop_totals[loop_poly] - 1))
+    fan_poly = loop_poly[fan]
+    centre = np.zeros((n_polys, 3))
+    for axis in range(3):
+        centre[:, axis] = np.bincount(
+            component[loop_poly], co[loop_verts, axis], minlength=n_polys)
+    centre /= np.maximum(np.bincount(component[loop_poly], minlength=n_polys), 1)[:, None]
+    origin = centre[component[fan_poly]]
+    a = co[loop_verts[loop_starts[fan_poly]]] - origin
+    b = co[loop_verts[fan]] - origin
+    c = co[loop_verts[fan + 1]] - origin
+    volume = np.einsum("ij,ij->i", a, np.cross(b, c))
+    volume = np.where(flip[fan_poly], -volume, volume)
+    signed = np.bincount(component[fan_poly], volume, minlength=n_polys)
+    scale = np.bincount(component[fan_poly], np.abs(volume), minlength=n_polys)
+
+    # flat or open parts have no inside, they keep the orientation most faces had
+    flipped = np.bincount(component, flip, minlength=n_polys)
+    size = np.bincount(component, minlength=n_polys)
+    flat = np.abs(signed) <= 1e-6 * scale
+    invert = np.where(flat, flipped * 2 > size, signed < 0)
+    flip ^= invert[component]
+
+    if not flip.any():
+        return 0
+
+    # reverse flipped faces keeping their first corner, v0 v1 v2 v3 -> v0 v3 v2 v1
+    start = loop_starts[loop_poly]
+    total = loop_totals[loop_poly]
+    corner_order = flipped_corner_order(loop_starts, loop_totals, flip)
+    edge_order = np.where(flip[loop_poly], start + total - 1 - pos, np.arange(n_loops))
+
+    mesh.loops.foreach_set("vertex_index", loop_verts[corner_order].astype(np.int32))
+    mesh.loops.foreach_set("edge_index", loop_edges[edge_order])
+    for attr in mesh.attributes:
+        if attr.domain != "CORNER" or attr.name.startswith(".") \
+                or attr.data_type not in CORNER_ATTRIBUTE_KEYS:
+            continue
+        key, width, dtype = CORNER_ATTRIBUTE_KEYS[attr.data_type]
+        values = np.empty(n_loops * width, dtype=dtype)
+        attr.data.foreach_get(key, values)
+        values = values.reshape(n_loops, width)[corner_order]
+        attr.data.foreach_set(key, values.ravel())
+    mesh.update()
+    return int(flip.sum())
+
+
+def orient_normals(selected, profile=None):
+    """Runs orient_mesh once per unique mesh"""
+    profile = profile or RunProfile()
+    flipped = 0
+    for obj in unique_mesh_objects(selected):
+        profile.object_start()
+        flipped += orient_mesh(obj.data)
+        profile.object_end("recalc normals", obj)
+    return flipped
+
+
+def clear_custom_split_normals(selected, context):
+    done = set()
+    for obj in selected:
+        if obj.data in done or not obj.data.has_custom_normals:
+            continue
+        done.add(obj.data)
+        if bpy.app.version >= (3, 2, 0):
+            with context.temp_override(object=obj, active_object=obj):
+                bpy.ops.mesh.customdata_custom_splitnormals_clear()
+        else:
+            # no temp_override before 3.2, the operator clears the active object
+            context.view_layer.objects.active = obj
+            bpy.ops.mesh.customdata_custom_splitnormals_clear()
+
+
+# bytes per element of color attribute types
+COLOR_BYTES = {"FLOAT_COLOR": 16, "BYTE_COLOR": 4}
+
+
+def referenced_layers(materials):
+    """Names of UV maps and attributes that material nodes read by name"""
+    names = set()
+    for material in materials:
+        if material is None or not material.node_tree:
+            continue
+        for node in material.node_tree.nodes:
+            for prop in ("uv_map", "layer_name", "attribute_name"):
+                name = getattr(node, prop, "")
+                if name:
+                    names.add(name)
+    return names
+
+
+def is_kept(name, keep):
+    return any(fnmatch.fnmatchcase(name, pattern) for pattern in keep)
+
+
+def duplicate_uv_layers(mesh, keep):
+    """UV maps holding the same coordinates as an earlier one"""
+    seen = []
+    duplicates = []
+    for layer in mesh.uv_layers:
+        uv = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+        layer.data.foreach_get("uv", uv)
+        if any(np.array_equal(uv, other) for other in seen) and \
+                not layer.active_render and not is_kept(layer.name, keep):
+            duplicates.append(layer.name)
+        else:
+            seen.append(uv)
+    return duplicates
+
+
+def white_color_attributes(mesh, keep):
+    """Color attributes with every element white and opaque"""
+    white = []
+    for attr in mesh.color_attributes:
+        if is_kept(attr.name, keep):
+            continue
+        values = np.empty(len(attr.data) * 4, dtype=np.float32)
+        attr.data.foreach_get("color", values)
+        if np.all(values >= 1.0 - 1e-6):
+            white.append(attr)
+    return white
+
+
+def used_vertex_groups(mesh, count):
+    """Indices of vertex groups with weight on any vertex of mesh.
+    bpy has no bulk read of weights, so the scan stops once count groups
+    have been seen"""
+    used = set()
+    for v in mesh.vertices:
+        used.update(g.group for g in v.groups if g.weight > 0)
+        if len(used) >= count:
+            break
+    return used
+
+
+def empty_vertex_groups(obj, used, keep):
+    """Vertex groups of obj that no vertex has any weight in"""
+    return [vg for vg in obj.vertex_groups if vg.index not in used and not is_kept(vg.name, keep)]
+
+
+def compact_layers(selected, keep=(), profile=None):
+    """Removes duplicate UV maps, all white color attributes and empty vertex
+    groups from the meshes of selected. Layers named in keep, which may use
+    wildcards, or read by material nodes stay. Returns the bytes saved"""
+    profile = profile or RunProfile()
+    saved = 0
+    for mesh, users in group_by_mesh(selected).items():
+        mesh_keep = list(keep) + list(referenced_layers(mesh.materials))
+        before = saved
+
+        for name in duplicate_uv_layers(mesh, mesh_keep):
+            mesh.uv_layers.remove(mesh.uv_layers[name])
+            saved += len(mesh.loops) * 8
+            profile.count("uv maps removed", 1)
+
+        for attr in white_color_attributes(mesh, mesh_keep):
+            saved += len(attr.data) * COLOR_BYTES.get(attr.data_type, 16)
+            mesh.color_attributes.remove(attr)
+            profile.count("color attributes removed", 1)
+
+        # vertex groups belong to objects, weights to the mesh they share
+        users = [user for user in users if user.vertex_groups]
+        if users:
+            used = used_vertex_groups(mesh, max(len(user.vertex_groups) for user in users))
+        for user in users:
+            for vg in empty_vertex_groups(user, used, mesh_keep):
+                user.vertex_groups.remove(vg)
+                profile.count("vertex groups removed", 1)
+
+        if saved > before:
+            profile.mesh_stat(mesh, "bytes saved", saved - before)
+    return saved
+
+
+def clean_objects(selected, context, profile=None):
+    """Runs the per mesh steps of clean_DAE on selected"""
+    profile = profile or RunProfile()
+    objects = selected
+    b_remd = context.scene.dc_settings.dc_rem_doubles_bool
+    b_limd = context.scene.dc_settings.dc_limited_disolve_bool
+    b_limd_mat = context.scene.dc_settings.dc_limited_disolve_material_bool
+    b_triq = context.scene.dc_settings.dc_tri_quad_bool
+    f_rdtol = context.scene.dc_settings.dc_rem_d_tol_float
+    b_auto_smt = context.scene.dc_settings.dc_rem_auto_smooth_norms_bool
+    b_rem_csn = context.scene.dc_settings.dc_rem_custom_split_normals
+    e_weld = context.scene.dc_settings.dc_weld_method_enum
+    b_apl_trans = context.scene.dc_settings.dc_apply_transforms
+    e_engine = context.scene.dc_settings.dc_clean_engine_enum
+    b_cache = context.scene.dc_settings.dc_cache_bool
+    e_shared = context.scene.dc_settings.dc_shared_transforms_enum
+    e_uv = context.scene.dc_settings.dc_uv_mode_enum
+    f_texel = context.scene.dc_settings.dc_uv_texel_float
+    e_normals = context.scene.dc_settings.dc_normals_method_enum
+    b_cull = context.scene.dc_settings.dc_cull_faces_bool
+    b_compact = context.scene.dc_settings.dc_compact_layers_bool
+    keep_layers = [name.strip() for name in context.scene.dc_settings.dc_keep_layers.split(",") if name.strip()]
+
+    # Shared meshes keep their instancing unless transforms must be applied to them
+    if b_apl_trans and e_shared == "SINGLE_USER":
+        make_single_user(selected)
+
+    # Swap in cached results, only misses are cleaned
+    if b_cache:
+        directory = cache_directory(context.scene.dc_settings)
+        count = len(selected)
+        with profile.stage("cache lookup", selected):
+            selected, cache_keys = cache_lookup(
+                selected, directory, settings_hash(context.scene.dc_settings), b_apl_trans,
+                b_rem_csn, context)
+        profile.count("cache hits", count - len(selected))
+        profile.count("cache misses", len(selected))
+
+        # hits skip the clean engines, give them their auto smooth step
+        if b_auto_smt:
+            misses = set(selected)
+            hits = [obj for obj in objects if obj not in misses]
+            with profile.stage("auto smooth", hits):
+                auto_smooth(hits, context)
+        if not selected:
+            stamp_meshes(objects, settings_hash(context.scene.dc_settings))
+            return
+
+    # Remove Doubles, the bmesh engine folds it into its own pass unless the
+    # cull needs welded faces or applied transforms would change the tolerance
+    b_weld_in_pass = e_engine == "BMESH" and not (b_cull or b_apl_trans)
+    if b_remd and e_weld == "NUMPY":
+        with profile.stage("remove doubles", selected):
+            weld_vertices(selected, f_rdtol, profile)
+    elif b_remd and not b_weld_in_pass:
+        with profile.stage("remove doubles", selected):
+            remove_doubles(selected, f_rdtol, profile)
+
+    # Cull degenerate and coincident faces before any stage has to process them
+    if b_cull:
+        with profile.stage("cull faces", selected):
+            culled = cull_faces(selected, f_rdtol * f_rdtol, profile)
+        for category, count in culled.items():
+            profile.count("%s faces" % category, count)
+
+    # Apply all transforms
+    if b_apl_trans:
+        with profile.stage("apply transforms", selected):
+            if context.scene.dc_settings.dc_transform_method_enum == "NUMPY":
+                apply_transforms_bulk(selected, context)
+            else:
+                apply_transforms(selected, context)
+
+    # deselect all
+    deselect_all(context)
+
+    # Mesh Clean, once per mesh however many objects use it
+    selected = unique_mesh_objects(selected)
+    options = (b_triq, b_limd, b_limd_mat, b_rem_csn, e_uv == "SMART",
+               e_normals == "OPERATOR")
+    failed = []
+    if e_engine == "BATCH":
+        failed = clean_batched(selected, context, options, b_auto_smt, profile)
+    elif e_engine == "BMESH":
+        if selected:
+            failed = clean_bmesh(
+                selected, context, options, b_auto_smt,
+                f_rdtol if b_remd and e_weld == "BMESH" and b_weld_in_pass else None,
+                profile)
+    else:
+        failed = clean_per_object(selected, context, options, b_auto_smt, profile)
+    failed_meshes = {obj.data for obj in failed}
+    if failed:
+        profile.count("failed objects", len(failed))
+
+    # Recalc normals on arrays, after the clean so it sees the final faces
+    if e_normals == "NUMPY":
+        with profile.stage("recalc normals", selected):
+            profile.count("faces flipped", orient_normals(selected, profile))
+
+    # UV Unwrap without operators
+    if e_uv == "BOX":
+        with profile.stage("uv unwrap", selected):
+            box_project(selected, f_texel)
+    elif e_uv == "KEEP":
+        with profile.stage("uv unwrap", selected):
+            box_project([obj for obj in selected if not obj.data.uv_layers], f_texel)
+
+    # Compact layers, after unwrapping so layers it added are checked too
+    if b_compact:
+        with profile.stage("compact layers", selected):
+            profile.count("layer bytes saved", compact_layers(objects, keep_layers, profile))
+
+    if b_cache:
+        with profile.stage("cache store"):
+            for mesh, key in cache_keys.items():
+                if mesh not in failed_meshes:
+                    cache_save(directory, key, mesh_to_arrays(mesh))
+            cache_evict(directory, context.scene.dc_settings.dc_cache_size_int * 1024 * 1024)
+
+    # failed meshes stay unstamped so the next run tries them again
+    with profile.stage("stamp"):
+        stamp_meshes([obj for obj in objects if obj.data not in failed_meshes],
+                     settings_hash(context.scene.dc_settings))
+
+
+def clean_DAE_steps(self, context, chunk_size=0):
+    """Generator version of clean_DAE.
+    Loose faces are joined first, then the meshes are cleaned chunk_size
+    objects at a time (all at once when 0), yielding (done, total) after
+    each chunk. The material dedup, join, dirty check and instance linking
+    before that yield (0, total) between phases and after every joined group.
+    Closing the generator early keeps the work done so far: merged
+    materials, joined groups, linked instances and cleaned chunks stay, the
+    rest of the selection is left as it was and no report is written"""
+    b_joinl = context.scene.dc_settings.dc_loose_face_bool
+    b_delc = context.scene.dc_settings.dc_camera_del_bool
+    e_engine = context.scene.dc_settings.dc_clean_engine_enum
+    b_instances = instances_wanted(context.scene.dc_settings)
+    f_rdtol = context.scene.dc_settings.dc_rem_d_tol_float
+    b_force = context.scene.dc_settings.dc_force_bool
+    b_apl_trans = context.scene.dc_settings.dc_apply_transforms
+    b_purge = context.scene.dc_settings.dc_purge_orphans_bool
+    b_dedup = context.scene.dc_settings.dc_dedup_materials_bool
+    s_report = bpy.path.abspath(context.scene.dc_settings.dc_report_path)
+    b_cprofile = context.scene.dc_settings.dc_cprofile_bool
+
+    if context.mode == "EDIT_MESH":
+        bpy.ops.object.mode_set(mode="OBJECT")
+
+    if not context.selected_objects:
+        self.report({"INFO"}, "No Objects Selected")
+        return
+
+    profile = RunProfile(context.scene.dc_settings.dc_report_slowest_int)
+    id_users = id_user_snapshot() if b_purge else None
+    profiler = cProfile.Profile() if b_cprofile else None
+    if profiler:
+        profiler.enable()
+
+    try:
+        cams = [obj for obj in context.selected_objects if obj.type == "CAMERA"]
+        total = len(context.selected_objects)
+
+        # merge duplicate materials first so joined meshes get fewer slots
+        if b_dedup:
+            with profile.stage("dedup materials"):
+                dedup_stats(profile, dedup_materials(context.selected_objects))
+            yield 0, total
+
+        # join loose faces, the stage is timed per group so time spent
+        # between steps of the modal operator is not counted
+        if b_joinl:
+            scope = join_scope(context)
+            before = mesh_counts(scope)
+            elapsed = 0.0
+            steps = join_selection_steps(context)
+            try:
+                while True:
+                    start = time.perf_counter()
+                    try:
+                        next(steps)
+                    except StopIteration as e:
+                        selected = e.value
+                        break
+                    finally:
+                        elapsed += time.perf_counter() - start
+                    yield 0, total
+            finally:
+                steps.close()
+            profile.record("join", elapsed, len(scope), before, mesh_counts(scope + selected))
+        else:
+            selected = context.selected_objects
+
+        selected = [obj for obj in selected if obj.type == "MESH"]
+        total = len(selected)
+
+        # skip meshes unchanged since they were last cleaned with these settings
+        if not b_force:
+            with profile.stage("dirty check", selected):
+                selected = dirty_objects(
+                    selected, settings_hash(context.scene.dc_settings), b_apl_trans)
+            profile.count("unchanged skipped", total - len(selected))
+            total = len(selected)
+            yield 0, total
+
+        # link identical meshes so later stages only see unique geometry
+        if b_instances:
+            with profile.stage("link instances", selected):
+                profile.count("instances linked", link_instances(selected, f_rdtol))
+            yield 0, total
+
+        for obj in selected:
+            # must deselect all for uv unwrapping to work
+            obj.select_set(False)
+        orig_verts, _faces = mesh_counts(selected)
+
+        chunk_size = chunk_size or max(total, 1)
+        yield 0, total
+
+        # chunks never split the users of a mesh, so each mesh is cleaned once
+        done = 0
+        chunk = []
+        groups = list(group_by_mesh(selected).values())
+        for i, objs in enumerate(groups):
+            chunk.extend(objs)
+            if len(chunk) < chunk_size and i < len(groups) - 1:
+                continue
+            clean_objects(chunk, context, profile)
+            done += len(chunk)
+            chunk = []
+            yield done, total
+
+        new_verts, _faces = mesh_counts(selected)
+
+        if b_delc:
+            with profile.stage("camera delete", cams):
+                delete_objects(cams)
+
+        deselect_all(context)
+
+        if b_purge:
+            with profile.stage("purge orphans"):
+                freed, freed_bytes = purge_orphans(id_users)
+            profile.count("datablocks purged", sum(freed.values()))
+            profile.count("bytes purged", freed_bytes)
+            for name, count in freed.items():
+                profile.count("%s purged" % name, count)
+    finally:
+        if profiler:
+            profiler.disable()
+
+    last_report.clear()
+    last_report.update(profile.as_dict())
+    if s_report:
+        profile.write(s_report)
+        if profiler:
+            profiler.dump_stats(os.path.splitext(s_report)[0] + ".prof")
+
     rem_v = orig_verts - new_verts
-    self.report({"INFO"}, "Doubles removed:%s" % (rem_v))
+    report = "Doubles removed:%s Time:%.2fs (%s)" % (
+        rem_v, last_report["total_time"], e_engine.lower())
+    if b_joinl:
+        report += " Join:%.2fs" % profile.stages["join"]["time"]
+    if profile.counters.get("unchanged skipped"):
+        report += " Unchanged skipped:%s" % profile.counters["unchanged skipped"]
+    if profile.counters.get("failed objects"):
+        report += " Failed:%s" % profile.counters["failed objects"]
+    if "degenerate faces" in profile.counters:
+        report += " Culled degenerate:%s duplicate:%s back-to-back:%s" % (
+            profile.counters["degenerate faces"], profile.counters["duplicate faces"],
+            profile.counters["back to back faces"])
+    if "instances linked" in profile.counters:
+        report += " Instances linked:%s" % profile.counters["instances linked"]
+    if profile.counters.get("materials merged") or profile.counters.get("images merged"):
+        report += " Merged materials:%s images:%s" % (
+            profile.counters["materials merged"], profile.counters["images merged"])
+    if profile.counters.get("layer bytes saved"):
+        report += " Layers:-%.1fMB" % (profile.counters["layer bytes saved"] / 1048576)
+    if profile.counters.get("datablocks purged"):
+        report += " Purged:%s (~%.1fMB)" % (
+            profile.counters["datablocks purged"], profile.counters["bytes purged"] / 1048576)
+    if "cache hits" in profile.counters:
+        report += " Cache hits:%s misses:%s" % (
+            profile.counters["cache hits"], profile.counters["cache misses"])
+    self.report({"INFO"}, report)
+
+
+@change_mouse_cursor
+def clean_DAE(self, context):
+    for _progress in clean_DAE_steps(self, context):
+        pass
+
 
 #############################################
 # OPERATOR
@@ -265,6 +2734,191 @@ class VIEW_OT_DAEClean(bpy.types.Operator):
         return self.execute(context)
 
 
+class VIEW_OT_DAECleanModal(bpy.types.Operator):
+    """Cleans the selected objects in small chunks so Blender stays responsive. Press ESC to cancel"""
+
+    bl_idname = "view3d.modal_operator_dae_clean_chunked"
+    bl_label = "Clean DAE (Interactive)"
+    bl_options = {"REGISTER", "UNDO"}
+
+    chunk_size: IntProperty(
+        name="Chunk Size", description="Objects cleaned per step", default=8, min=1
+    )
+
+    time_budget: FloatProperty(
+        name="Time Budget", description="Seconds of work per timer tick", default=0.1, min=0.01
+    )
+
+    _timer = None
+    _steps = None
+    _start = 0.0
+
+    def execute(self, context):
+        try:
+            clean_DAE(self, context)
+        except Exception as e:
+            print(e)
+            clean_up()
+        return {"FINISHED"}
+
+    def invoke(self, context, event):
+        # modal only steps in object mode, so leave any other mode up front
+        if context.mode != "OBJECT":
+            bpy.ops.object.mode_set(mode="OBJECT")
+        self._steps = clean_DAE_steps(self, context, self.chunk_size)
+        self._start = time.perf_counter()
+
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.01, window=context.window)
+        wm.progress_begin(0, 100)
+        wm.modal_handler_add(self)
+        return {"RUNNING_MODAL"}
+
+    def modal(self, context, event):
+        if event.type == "ESC":
+            self._steps.close()
+            self.finish(context)
+            self.report({"INFO"}, "Clean DAE cancelled")
+            # processed objects stay cleaned and get an undo step
+            return {"FINISHED"}
+
+        if event.type != "TIMER" or context.mode != "OBJECT":
+            return {"PASS_THROUGH"}
+
+        deadline = time.perf_counter() + self.time_budget
+        try:
+            while time.perf_counter() < deadline:
+                done, total = next(self._steps)
+        except StopIteration:
+            self.finish(context)
+            return {"FINISHED"}
+        except Exception as e:
+            print(e)
+            self._steps.close()
+            self.finish(context)
+            return {"FINISHED"}
+
+        elapsed = time.perf_counter() - self._start
+        rate = done / elapsed if elapsed else 0.0
+        eta = (total - done) / rate if rate else 0.0
+        context.window_manager.progress_update(100 * done / max(total, 1))
+        context.workspace.status_text_set(
+            "Clean DAE: %s/%s objects, %.1f objects/s, ETA %ds (ESC to cancel)"
+            % (done, total, rate, eta))
+        return {"PASS_THROUGH"}
+
+    def finish(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+        if context.mode != "OBJECT":
+            bpy.ops.object.mode_set(mode="OBJECT")
+
+
+class VIEW_OT_DAECleanSharded(bpy.types.Operator):
+    """Cleans the selected meshes in parallel background Blender processes"""
+
+    bl_idname = "view3d.dae_clean_sharded"
+    bl_label = "Clean DAE (Sharded)"
+    bl_options = {"REGISTER", "UNDO"}
+
+    @classmethod
+    def poll(cls, context):
+        # workers run dae_batch.py from the add-on package
+        return sibling_module("dae_batch") is not None
+
+    def execute(self, context):
+        try:
+            clean_DAE_sharded(self, context)
+        except Exception as e:
+            print(e)
+            clean_up()
+        return {"FINISHED"}
+
+
+class VIEW_OT_DAECleanNoUndo(bpy.types.Operator):
+    """Cleans without a global undo step, saving the affected objects to a checkpoint file first"""
+
+    bl_idname = "view3d.dae_clean_no_undo"
+    bl_label = "Clean DAE (No Undo)"
+    bl_options = {"REGISTER"}
+
+    def execute(self, context):
+        if context.mode == "EDIT_MESH":
+            bpy.ops.object.mode_set(mode="OBJECT")
+
+        path = checkpoint_path(context)
+        objects = set(context.selected_objects)
+        # joining loose faces also touches the children of the selection
+        objects.update(c for obj in context.selected_objects for c in obj.children)
+        write_checkpoint(objects, path)
+        context.scene.dc_settings.dc_last_checkpoint = path
+
+        try:
+            clean_DAE(self, context)
+        except Exception as e:
+            print(e)
+            clean_up()
+        record_created(path)
+        return {"FINISHED"}
+
+
+class VIEW_OT_DAERestoreCheckpoint(bpy.types.Operator):
+    """Puts back the objects saved by the last Clean DAE (No Undo)"""
+
+    bl_idname = "view3d.dae_restore_checkpoint"
+    bl_label = "Restore Checkpoint"
+    bl_options = {"REGISTER"}
+
+    @classmethod
+    def poll(cls, context):
+        return os.path.exists(bpy.path.abspath(context.scene.dc_settings.dc_last_checkpoint))
+
+    def execute(self, context):
+        if context.mode == "EDIT_MESH":
+            bpy.ops.object.mode_set(mode="OBJECT")
+
+        restored, recreated = restore_checkpoint(
+            context, bpy.path.abspath(context.scene.dc_settings.dc_last_checkpoint))
+        self.report({"INFO"}, "Restored:%s Recreated:%s" % (restored, recreated))
+        return {"FINISHED"}
+
+
+class IMPORT_OT_DAEPreclean(bpy.types.Operator, ImportHelper):
+    """Strips duplicate positions and cameras from a .dae file before importing it"""
+
+    bl_idname = "import_scene.dae_preclean"
+    bl_label = "Import Pre-cleaned DAE"
+    bl_options = {"REGISTER", "UNDO"}
+
+    filename_ext = ".dae"
+    filter_glob: StringProperty(default="*.dae", options={"HIDDEN"})
+
+    @classmethod
+    def poll(cls, context):
+        return sibling_module("dae_preclean") is not None
+
+    def execute(self, context):
+        preclean_file = sibling_module("dae_preclean").preclean_file
+
+        # keep the copy next to the original so relative texture paths resolve
+        fd, path = tempfile.mkstemp(
+            suffix=".dae", dir=os.path.dirname(os.path.abspath(self.filepath)))
+        os.close(fd)
+        try:
+            stats = preclean_file(
+                self.filepath, path,
+                remove_cameras=context.scene.dc_settings.dc_camera_del_bool)
+            bpy.ops.wm.collada_import(filepath=path)
+        finally:
+            os.remove(path)
+
+        self.report({"INFO"}, "Positions welded:%s Cameras removed:%s Pre-clean:%.2fs" % (
+            stats["positions_welded"], stats["cameras_removed"], stats["time"]))
+        return {"FINISHED"}
+
+
 #############################################
 # PANEL
 ############################################
@@ -296,6 +2950,22 @@ class PANEL_PT_CleanDAE(bpy.types.Panel):
             context.scene.dc_settings, "dc_rem_d_tol_float", text="Distance"
         )
 
+        sub = box.row()
+        sub.prop(
+            context.scene.dc_settings, "dc_weld_method_enum", text="Weld"
+        )
+        sub.enabled = context.scene.dc_settings.dc_rem_doubles_bool
+
+        row = box.row()
+        row.prop(
+            context.scene.dc_settings, "dc_cull_faces_bool", text="Cull Degenerate & Coincident Faces"
+        )
+
+        row = box.row()
+        row.prop(
+            context.scene.dc_settings, "dc_normals_method_enum", text="Normals"
+        )
+
         row = box.row()
         row.prop(
             context.scene.dc_settings, "dc_loose_face_bool", text="Join Loose Faces"
@@ -305,6 +2975,41 @@ class PANEL_PT_CleanDAE(bpy.types.Panel):
             context.scene.dc_settings, "dc_camera_del_bool", text="Remove Cameras"
         )
 
+        row = box.row()
+        row.prop(
+            context.scene.dc_settings, "dc_dedup_materials_bool", text="Merge Duplicate Materials"
+        )
+
+        row = box.row()
+        row.prop(
+            context.scene.dc_settings, "dc_purge_orphans_bool", text="Purge Orphans"
+        )
+
+        sub = box.column()
+        sub.prop(
+            context.scene.dc_settings, "dc_join_strategy_enum", text="Join By"
+        )
+        if context.scene.dc_settings.dc_join_strategy_enum == "GRID":
+            sub.prop(
+                context.scene.dc_settings, "dc_grid_cell_float", text="Cell Size"
+            )
+            sub.prop(
+                context.scene.dc_settings, "dc_grid_vertex_budget_int", text="Vertex Budget"
+            )
+        else:
+            sub.prop(
+                context.scene.dc_settings, "dc_fast_join_bool", text="Join Mesh Data Directly"
+            )
+        sub.enabled = context.scene.dc_settings.dc_loose_face_bool
+
+        row = box.row()
+        row.prop(
+            context.scene.dc_settings, "dc_link_instances_bool", text="Link Identical Meshes"
+        )
+        # Shared Meshes: Single User would split the linked meshes again
+        row.enabled = not (context.scene.dc_settings.dc_apply_transforms
+                           and context.scene.dc_settings.dc_shared_transforms_enum == "SINGLE_USER")
+
         row = box.row()
         row.prop(
             context.scene.dc_settings, "dc_rem_auto_smooth_norms_bool", text="Remove Auto-Smooth Normals"
@@ -315,11 +3020,60 @@ class PANEL_PT_CleanDAE(bpy.types.Panel):
             context.scene.dc_settings, "dc_rem_custom_split_normals", text="Clear Custom Split Normals"
         )
 
+        row = box.row()
+        row.prop(
+            context.scene.dc_settings, "dc_compact_layers_bool", text="Remove Unused Layers"
+        )
+        sub = box.row()
+        sub.prop(
+            context.scene.dc_settings, "dc_keep_layers", text="Keep"
+        )
+        sub.enabled = context.scene.dc_settings.dc_compact_layers_bool
+
         row = box.row()
         row.prop(
             context.scene.dc_settings, "dc_apply_transforms", text="Apply All Transforms"
         )
 
+        sub = box.column()
+        sub.prop(
+            context.scene.dc_settings, "dc_shared_transforms_enum", text="Shared Meshes"
+        )
+        sub.prop(
+            context.scene.dc_settings, "dc_transform_method_enum", text="Method"
+        )
+        sub.enabled = context.scene.dc_settings.dc_apply_transforms
+
+        row = box.row()
+        row.prop(
+            context.scene.dc_settings, "dc_clean_engine_enum", text="Engine"
+        )
+
+        row = box.row()
+        row.prop(
+            context.scene.dc_settings, "dc_uv_mode_enum", text="UVs"
+        )
+        sub = row.row()
+        sub.prop(
+            context.scene.dc_settings, "dc_uv_texel_float", text="Scale"
+        )
+        sub.enabled = context.scene.dc_settings.dc_uv_mode_enum in {"BOX", "KEEP"}
+
+        box = layout.box()
+        box.label(text="Cache:")
+        box.prop(
+            context.scene.dc_settings, "dc_cache_bool", text="Cache Cleaned Meshes"
+        )
+
+        sub = box.column()
+        sub.prop(
+            context.scene.dc_settings, "dc_cache_dir", text="Directory"
+        )
+        sub.prop(
+            context.scene.dc_settings, "dc_cache_size_int", text="Max Size (MB)"
+        )
+        sub.enabled = context.scene.dc_settings.dc_cache_bool
+
         box = layout.box()
         box.label(text="Limited Dissolve:")
         box.prop(
@@ -335,8 +3089,86 @@ class PANEL_PT_CleanDAE(bpy.types.Panel):
         # Execute Button
         box = layout.box()
         row = box.row()
-        row.operator("view3d.modal_operator_dae_clean")
+        row.prop(
+            context.scene.dc_settings, "dc_force_bool", text="Force Re-clean"
+        )
+        row = box.row()
+        row.prop(
+            context.scene.dc_settings, "dc_no_undo_bool", text="No Undo (Checkpoint)"
+        )
+        row = box.row()
+        row.operator("import_scene.dae_preclean")
+        if context.scene.dc_settings.dc_no_undo_bool:
+            box.prop(
+                context.scene.dc_settings, "dc_checkpoint_dir", text="Checkpoint"
+            )
+            row = box.row()
+            row.operator("view3d.dae_clean_no_undo")
+            row = box.row()
+            row.operator("view3d.dae_restore_checkpoint")
+        else:
+            row = box.row()
+            row.operator("view3d.modal_operator_dae_clean")
+            row = box.row()
+            row.operator("view3d.modal_operator_dae_clean_chunked")
+            row = box.row()
+            row.operator("view3d.dae_clean_sharded")
+            row.prop(context.scene.dc_settings, "dc_shard_jobs_int", text="Jobs")
+
+
+
+class PANEL_PT_CleanDAEReport(bpy.types.Panel):
+    bl_idname = "PANEL_PT_CleanDAEReport"
+    bl_label = "Last Run"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "DAE Tools"
+    bl_parent_id = "PANEL_PT_CleanDAE"
+    bl_options = {"DEFAULT_CLOSED"}
 
+    def draw(self, context):
+        layout = self.layout
+
+        box = layout.box()
+        box.prop(
+            context.scene.dc_settings, "dc_report_path", text="Report"
+        )
+        row = box.row()
+        row.prop(
+            context.scene.dc_settings, "dc_cprofile_bool", text="cProfile"
+        )
+        row.prop(
+            context.scene.dc_settings, "dc_report_slowest_int", text="Slowest"
+        )
+
+        if not last_report:
+            layout.label(text="Run Clean DAE to see timings")
+            return
+
+        box = layout.box()
+        col = box.column(align=True)
+        row = col.row()
+        row.label(text="Stage")
+        row.label(text="Time")
+        row.label(text="Verts")
+        for stage in sorted(last_report["stages"], key=lambda s: -s["time"]):
+            row = col.row()
+            row.label(text=stage["stage"])
+            row.label(text="%.2fs" % stage["time"])
+            row.label(text="%s > %s" % (stage["verts_before"], stage["verts_after"]))
+        row = col.row()
+        row.label(text="total")
+        row.label(text="%.2fs" % last_report["total_time"])
+        row.label(text="")
+
+        if last_report["slowest_objects"]:
+            box = layout.box()
+            box.label(text="Slowest Objects:")
+            col = box.column(align=True)
+            for item in last_report["slowest_objects"]:
+                row = col.row()
+                row.label(text=item["name"])
+                row.label(text="%.3fs" % item["time"])
 
 
 #############################################
@@ -360,10 +3192,45 @@ class DCSettings(bpy.types.PropertyGroup):
         name="", description="Join Loose Faces", default=True
     )
 
+    dc_fast_join_bool: BoolProperty(
+        name="", description="Join loose faces by merging mesh data directly instead of using the join operator. Faster, but drops vertex groups, color attributes and edge data", default=False
+    )
+
+    dc_join_strategy_enum: EnumProperty(
+        name="",
+        description="How loose faces are grouped when joining",
+        items=[
+            ("NAME", "Name", "Join objects sharing a base name, e.g. Name, Name.001"),
+            ("GRID", "Grid", "Join objects by location into grid cells, one object per material per cell. "
+             "Rebuilds the mesh data, so vertex groups, color attributes, custom normals and edge data are dropped"),
+        ],
+        default="NAME",
+    )
+
+    dc_grid_cell_float: FloatProperty(
+        name="", description="Size of a grid cell", default=50.0, min=0.01
+    )
+
+    dc_grid_vertex_budget_int: IntProperty(
+        name="", description="Cells with more vertices than this are split into octants", default=100000, min=1
+    )
+
+    dc_link_instances_bool: BoolProperty(
+        name="", description="Replace meshes that are identical up to a rigid transform with linked copies of one mesh", default=False
+    )
+
     dc_camera_del_bool: BoolProperty(
         name="", description="Remove Cameras", default=True
     )
 
+    dc_dedup_materials_bool: BoolProperty(
+        name="", description="Merge materials with identical settings and node trees, and images with the same file or pixels, into one copy each", default=False
+    )
+
+    dc_purge_orphans_bool: BoolProperty(
+        name="", description="Remove meshes, materials, images and cameras left without users by the run", default=True
+    )
+
     dc_rem_doubles_bool: BoolProperty(
         name="", description="Remove Doubles", default=True
     )
@@ -372,6 +3239,30 @@ class DCSettings(bpy.types.PropertyGroup):
         name="", description="Remove Doubles Tolerance", default=0.001
     )
 
+    dc_weld_method_enum: EnumProperty(
+        name="",
+        description="How doubles are removed",
+        items=[
+            ("BMESH", "BMesh", "Weld with bmesh remove_doubles"),
+            ("NUMPY", "Spatial Hash", "Weld with a vectorized spatial hash. Faster on large meshes but drops vertex groups, colors and custom normals of welded meshes"),
+        ],
+        default="BMESH",
+    )
+
+    dc_cull_faces_bool: BoolProperty(
+        name="", description="Remove zero area faces, duplicate faces and double sided faces exported as two coincident opposite faces", default=False
+    )
+
+    dc_normals_method_enum: EnumProperty(
+        name="",
+        description="How face normals are made consistent",
+        items=[
+            ("OPERATOR", "Operator", "Recalculate normals with the clean engine, normals_make_consistent or bmesh"),
+            ("NUMPY", "Arrays", "Flood fill the winding of each connected part on arrays and point it outward by signed volume. Faster on very large meshes"),
+        ],
+        default="OPERATOR",
+    )
+
     dc_rem_auto_smooth_norms_bool: BoolProperty(
         name="", description="Remove Auto-smoothing of normals", default=True
     )
@@ -380,6 +3271,105 @@ class DCSettings(bpy.types.PropertyGroup):
         name="", description="Clear Custom Split Normals", default=True
     )
 
+    dc_compact_layers_bool: BoolProperty(
+        name="", description="Remove duplicate UV maps, all white color attributes and empty vertex groups", default=False
+    )
+
+    dc_keep_layers: StringProperty(
+        name="", description="Comma separated UV map, attribute and vertex group names to always keep, * and ? wildcards allowed", default=""
+    )
+
     dc_apply_transforms: BoolProperty(
         name="", description="Apply All Transforms", default=True
-    )
\ No newline at end of file
+    )
+
+    dc_shared_transforms_enum: EnumProperty(
+        name="",
+        description="How Apply All Transforms treats meshes used by several objects",
+        items=[
+            ("SKIP", "Keep Instances", "Leave transforms of objects sharing a mesh as they are"),
+            ("SINGLE_USER", "Make Single User", "Give each object its own copy of the mesh, then apply"),
+        ],
+        default="SKIP",
+    )
+
+    dc_transform_method_enum: EnumProperty(
+        name="",
+        description="How transforms are applied",
+        items=[
+            ("OPERATOR", "Operator", "Call transform_apply once per object"),
+            ("NUMPY", "Bulk", "Bake the transforms into the vertex arrays directly"),
+        ],
+        default="OPERATOR",
+    )
+
+    dc_clean_engine_enum: EnumProperty(
+        name="",
+        description="How the mesh cleaning operators are run",
+        items=[
+            ("OBJECT", "Per Object", "Enter edit mode once per object"),
+            ("BATCH", "Batched", "Clean all objects in a single multi-object edit session"),
+            ("BMESH", "BMesh", "Clean each unique mesh with bmesh.ops, without edit mode operators"),
+        ],
+        default="OBJECT",
+    )
+
+    dc_uv_mode_enum: EnumProperty(
+        name="",
+        description="How cleaned meshes are UV unwrapped",
+        items=[
+            ("SMART", "Smart Project", "Unwrap with smart_project"),
+            ("BOX", "Box Projection", "Project from the dominant world axis of each face, fast on axis aligned models"),
+            ("KEEP", "Keep Existing", "Keep existing UV maps, box project meshes without any"),
+            ("NONE", "None", "Skip UV unwrapping"),
+        ],
+        default="SMART",
+    )
+
+    dc_uv_texel_float: FloatProperty(
+        name="", description="UV units per scene unit for box projection", default=1.0, min=0.0001
+    )
+
+    dc_force_bool: BoolProperty(
+        name="", description="Clean every selected mesh, even those unchanged since they were last cleaned with the same settings", default=False
+    )
+
+    dc_shard_jobs_int: IntProperty(
+        name="", description="Background Blender processes for the sharded clean, 0 uses one per CPU", default=0, min=0
+    )
+
+    dc_no_undo_bool: BoolProperty(
+        name="", description="Skip the global undo step and save a checkpoint of the affected objects instead. Saves memory on very large scenes", default=False
+    )
+
+    dc_checkpoint_dir: StringProperty(
+        name="", description="Checkpoint directory, uses the system temp directory when empty", default="", subtype="DIR_PATH"
+    )
+
+    dc_last_checkpoint: StringProperty(
+        name="", description="Checkpoint written by the last clean without undo", default="", subtype="FILE_PATH"
+    )
+
+    dc_cache_bool: BoolProperty(
+        name="", description="Reuse cleaned meshes from earlier runs when geometry and settings match", default=False
+    )
+
+    dc_cache_dir: StringProperty(
+        name="", description="Cache directory, uses the system temp directory when empty", default="", subtype="DIR_PATH"
+    )
+
+    dc_cache_size_int: IntProperty(
+        name="", description="Maximum cache size in MB, least recently used entries are removed first", default=1024, min=1
+    )
+
+    dc_report_path: StringProperty(
+        name="", description="Write a JSON report of every stage to this file", default="", subtype="FILE_PATH"
+    )
+
+    dc_cprofile_bool: BoolProperty(
+        name="", description="Also write cProfile stats (.prof) next to the report", default=False
+    )
+
+    dc_report_slowest_int: IntProperty(
+        name="", description="Number of slowest objects kept in the report", default=10, min=0
+    )
@@ -25,7 +25,7 @@ bl_info = {
     "name": "DAEClean",
     "description": "Removes doubles, recalculates normals, UV unwraps and other operations to clean imported mesh. Intended for use mainly on imported DAEs but can work on any selected objects",
     "author": "Daniel Norris, DN DRAWINGS <https://dndrawings.com>",
-    "version": (0, 1, 7),
+    "version": (0, 1, 8),
     "blender": (2, 80, 0),
     "category": "3D View",
 }
@@ -36,7 +36,7 @@ import importlib
 from . import DAEClean
 # importlib.reload(construction_lines28)
 
-from .DAEClean import VIEW_OT_DAEClean, PANEL_PT_CleanDAE, DCSettings
+from .DAEClean import VIEW_OT_DAEClean, VIEW_OT_DAECleanModal, VIEW_OT_DAECleanSharded, VIEW_OT_DAECleanNoUndo, VIEW_OT_DAERestoreCheckpoint, IMPORT_OT_DAEPreclean, PANEL_PT_CleanDAE, PANEL_PT_CleanDAEReport, DCSettings
 
 
 import bpy  # type: ignore
@@ -47,7 +47,13 @@ import bpy  # type: ignore
 ############################################
 classes = (
     VIEW_OT_DAEClean,
+    VIEW_OT_DAECleanModal,
+    VIEW_OT_DAECleanSharded,
+    VIEW_OT_DAECleanNoUndo,
+    VIEW_OT_DAERestoreCheckpoint,
+    IMPORT_OT_DAEPreclean,
     PANEL_PT_CleanDAE,
+    PANEL_PT_CleanDAEReport,
     DCSettings
 )
 
@@ -55,7 +61,7 @@ classes = (
 #############################################
 # REG/UN_REG
 ############################################
-classes = (VIEW_OT_DAEClean, PANEL_PT_CleanDAE, DCSettings)
+classes = (VIEW_OT_DAEClean, VIEW_OT_DAECleanModal, VIEW_OT_DAECleanSharded, VIEW_OT_DAECleanNoUndo, VIEW_OT_DAERestoreCheckpoint, IMPORT_OT_DAEPreclean, PANEL_PT_CleanDAE, PANEL_PT_CleanDAEReport, DCSettings)
 
 
 def register():
@@ -0,0 +1,215 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Project Name:        DAE Clean
+# License:             GPL
+# Authors:             Daniel Norris, DN Drawings
+
+"""Benchmarks DAEClean on synthetic SketchUp-style scenes.
+
+    blender -b --factory-startup -P benchmarks/bench_daeclean.py -- \\
+        --scales 100,1000,5000 --out bench.json
+
+Each scale point builds a fresh scene of that many mesh objects, grouped
+under empties as "Name", "Name.001", ... fragments the way the COLLADA
+importer names SketchUp groups. Every mesh is a triangulated grid with a
+share of its triangles given their own duplicate vertices, and some
+objects can share mesh data like component instances.
+
+clean_DAE and the helpers traverse_groups (through join_loose_faces),
+remove_doubles and apply_transforms are each timed on their own fresh copy
+of the scene, with the preset applied. traverse_groups uses the join the
+preset picks with dc_fast_join_bool. Results go to a JSON file so runs of
+different versions can be compared.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import bpy  # type: ignore
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import dae_batch  # noqa: E402
+
+
+#############################################
+# SCENE GENERATOR
+############################################
+def grid_arrays(size, dup_ratio, rng):
+    """Arrays of a size x size triangulated grid in the mesh_to_arrays format.
+    dup_ratio of the triangles get their own copies of their vertices"""
+    n = size + 1
+    xs, ys = np.meshgrid(np.arange(n, dtype=np.float32), np.arange(n, dtype=np.float32))
+    co = np.stack([xs.ravel(), ys.ravel(), np.zeros(n * n, dtype=np.float32)], axis=1)
+
+    i = np.arange(size)
+    corner = (i[None, :] + i[:, None] * n).ravel()
+    tris = np.concatenate([
+        np.stack([corner, corner + 1, corner + n + 1], axis=1),
+        np.stack([corner, corner + n + 1, corner + n], axis=1),
+    ])
+
+    dup = rng.random(len(tris)) < dup_ratio
+    n_dup = int(dup.sum())
+    if n_dup:
+        dup_co = co[tris[dup].ravel()]
+        tris[dup] = len(co) + np.arange(n_dup * 3).reshape(-1, 3)
+        co = np.concatenate([co, dup_co])
+
+    n_tris = len(tris)
+    return {
+        "co": co,
+        "loop_verts": tris.ravel().astype(np.int32),
+        "loop_starts": np.arange(0, n_tris * 3, 3, dtype=np.int32),
+        "loop_totals": np.full(n_tris, 3, dtype=np.int32),
+        "material_index": np.zeros(n_tris, dtype=np.int32),
+        "use_smooth": np.zeros(n_tris, dtype=bool),
+        "loose_edges": np.zeros((0, 2), dtype=np.int32),
+        "uvs": [],
+    }
+
+
+def build_scene(dc, objects, fragments, grid, dup_ratio, shared_ratio, seed):
+    """Fills the current, empty scene. Returns the number of mesh objects"""
+    rng = np.random.default_rng(seed)
+    collection = bpy.context.scene.collection
+    meshes = []
+
+    for g in range(max(objects // fragments, 1)):
+        parent = bpy.data.objects.new("Group_%s" % g, None)
+        collection.objects.link(parent)
+        parent.location = (g % 100 * (grid + 2), g // 100 * (grid + 2), 0)
+
+        for f in range(fragments):
+            if meshes and rng.random() < shared_ratio:
+                mesh = meshes[rng.integers(len(meshes))]
+            else:
+                mesh = bpy.data.meshes.new("Mesh_%s_%s" % (g, f))
+                dc.arrays_to_mesh(mesh, grid_arrays(grid, dup_ratio, rng))
+                meshes.append(mesh)
+
+            name = "Part_%s" % g if f == 0 else "Part_%s.%03d" % (g, f)
+            obj = bpy.data.objects.new(name, mesh)
+            collection.objects.link(obj)
+            obj.parent = parent
+            obj.location = (0, 0, f * 0.5)
+            obj.rotation_euler = (0, 0, rng.random())
+
+    bpy.context.view_layer.update()
+    return sum(1 for o in bpy.context.scene.objects if o.type == "MESH")
+
+
+#############################################
+# TIMING
+############################################
+def fresh_scene(dc, preset, params):
+    """Builds the scene in a new empty file, the preset has to be applied
+    again since the settings live on the scene"""
+    bpy.ops.wm.read_homefile(use_empty=True)
+    dae_batch.apply_preset(bpy.context.scene.dc_settings, preset)
+    count = build_scene(dc, **params)
+    for obj in bpy.context.scene.objects:
+        obj.select_set(True)
+    return count
+
+
+def time_call(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def bench_scale(dc, preset, params):
+    context = bpy.context
+    result = {"params": params}
+
+    result["objects"] = fresh_scene(dc, preset, params)
+    result["verts_before"] = dae_batch.mesh_vertex_count(context.scene.objects)
+    report = dae_batch.BatchReport()
+    result["clean_DAE"] = time_call(lambda: dc.clean_DAE(report, context))
+    result["verts_after"] = dae_batch.mesh_vertex_count(context.scene.objects)
+    result["messages"] = report.messages
+    result["stages"] = dc.last_report.get("stages", [])
+
+    fresh_scene(dc, preset, params)
+    names = [o.name for o in context.selected_objects]
+    direct = context.scene.dc_settings.dc_fast_join_bool
+    result["traverse_groups_direct"] = direct
+    result["traverse_groups"] = time_call(lambda: dc.join_loose_faces(context, names, direct))
+
+    fresh_scene(dc, preset, params)
+    meshes = [o for o in context.scene.objects if o.type == "MESH"]
+    result["remove_doubles"] = time_call(
+        lambda: dc.remove_doubles(meshes, context.scene.dc_settings.dc_rem_d_tol_float))
+
+    fresh_scene(dc, preset, params)
+    meshes = [o for o in context.scene.objects if o.type == "MESH"]
+    for obj in meshes:
+        obj.select_set(False)
+    result["apply_transforms"] = time_call(lambda: dc.apply_transforms(meshes, context))
+
+    return result
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="bench_daeclean.py")
+    parser.add_argument("--scales", default="100,1000", help="comma separated object counts")
+    parser.add_argument("--fragments", type=int, default=4, help="Name.NNN fragments per group")
+    parser.add_argument("--grid", type=int, default=8, help="grid size, 2 * grid^2 triangles per mesh")
+    parser.add_argument("--dup-ratio", type=float, default=0.5, help="share of triangles with duplicate vertices")
+    parser.add_argument("--shared-ratio", type=float, default=0.0, help="share of objects reusing mesh data")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--preset", default="", help="JSON or TOML file of DCSettings fields")
+    parser.add_argument("--out", default="bench.json")
+    args = parser.parse_args(argv)
+
+    bpy.ops.wm.read_homefile(use_empty=True)
+    dc = dae_batch.load_addon()
+    preset = dae_batch.load_preset(args.preset)
+
+    results = {
+        "blender": bpy.app.version_string,
+        "preset": preset,
+        "scales": [],
+    }
+    for scale in (int(s) for s in args.scales.split(",")):
+        params = {
+            "objects": scale,
+            "fragments": args.fragments,
+            "grid": args.grid,
+            "dup_ratio": args.dup_ratio,
+            "shared_ratio": args.shared_ratio,
+            "seed": args.seed,
+        }
+        result = bench_scale(dc, preset, params)
+        results["scales"].append(result)
+        print("%6s objects: clean_DAE %.2fs traverse_groups %.2fs "
+              "remove_doubles %.2fs apply_transforms %.2fs" % (
+                  result["objects"], result["clean_DAE"], result["traverse_groups"],
+                  result["remove_doubles"], result["apply_transforms"]))
+
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main(sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else [])
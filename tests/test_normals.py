@@ -0,0 +1,118 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Project Name:        DAE Clean
+# License:             GPL
+# Authors:             Daniel Norris, DN Drawings
+
+"""Checks the array based normal recalculation against the operator on the
+tutorial file.
+
+    blender -b --factory-startup -P tests/test_normals.py
+
+Imports Tutorial Files/DAETut.dae twice and welds both copies, then orients
+one with orient_normals and the other with
+normals_make_consistent(inside=False). Exits non-zero if any face ends up
+wound the other way or an oriented mesh is invalid.
+"""
+
+import os
+import sys
+
+import bpy  # type: ignore
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import dae_batch  # noqa: E402
+
+DAE_PATH = os.path.join(ROOT, "Tutorial Files", "DAETut.dae")
+TOLERANCE = 0.001
+
+
+def oriented_normals(dc, method):
+    """Face normals of each mesh object after orienting a fresh, welded
+    import, and whether all meshes are valid"""
+    bpy.ops.wm.read_homefile(use_empty=True)
+    bpy.ops.wm.collada_import(filepath=DAE_PATH)
+    context = bpy.context
+    objects = [o for o in context.scene.objects if o.type == "MESH"]
+    dc.remove_doubles(objects, TOLERANCE)
+
+    if method == "NUMPY":
+        dc.orient_normals(objects)
+    else:
+        dc.deselect_all(context)
+        dc.select_objects(objects)
+        context.view_layer.objects.active = objects[0]
+        bpy.ops.object.mode_set(mode="EDIT")
+        bpy.ops.mesh.select_all(action="SELECT")
+        bpy.ops.mesh.normals_make_consistent(inside=False)
+        bpy.ops.object.mode_set(mode="OBJECT")
+
+    normals = {}
+    for obj in objects:
+        mesh = obj.data
+        mesh.update()
+        values = np.empty(len(mesh.polygons) * 3, dtype=np.float32)
+        mesh.polygons.foreach_get("normal", values)
+        areas = np.empty(len(mesh.polygons), dtype=np.float32)
+        mesh.polygons.foreach_get("area", areas)
+        normals[obj.name] = (values.reshape(-1, 3), areas)
+
+    meshes = set(o.data for o in objects)
+    # validate returns True when it had to fix something
+    valid = not any(m.validate(verbose=True) for m in meshes)
+    return normals, valid
+
+
+def main():
+    bpy.ops.wm.read_homefile(use_empty=True)
+    dc = dae_batch.load_addon()
+
+    expected, _valid = oriented_normals(dc, "OPERATOR")
+    found, numpy_valid = oriented_normals(dc, "NUMPY")
+
+    faces = 0
+    flipped = 0
+    for name, (normals, areas) in expected.items():
+        if name not in found or len(found[name][0]) != len(normals):
+            print("FAIL: %s has different faces in the two imports" % name)
+            flipped += len(normals)
+            continue
+        # faces without area have no winding to compare
+        solid = areas > 1e-12
+        dots = np.einsum("ij,ij->i", normals[solid], found[name][0][solid])
+        faces += int(solid.sum())
+        flipped += int((dots < 0).sum())
+    print("%s faces, %s wound differently" % (faces, flipped))
+
+    failed = False
+    if flipped:
+        print("FAIL: orient_normals disagrees with normals_make_consistent")
+        failed = True
+    if not numpy_valid:
+        print("FAIL: orient_normals left invalid geometry")
+        failed = True
+    if not failed:
+        print("OK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Project Name:        DAE Clean
+# License:             GPL
+# Authors:             Daniel Norris, DN Drawings
+
+"""Checks the NumPy weld against bmesh remove_doubles on the tutorial file.
+
+    blender -b --factory-startup -P tests/test_weld.py
+
+Imports Tutorial Files/DAETut.dae twice, welds one copy with each method
+and exits non-zero if the vertex counts differ or a welded mesh is invalid.
+"""
+
+import os
+import sys
+
+import bpy  # type: ignore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import dae_batch  # noqa: E402
+
+DAE_PATH = os.path.join(ROOT, "Tutorial Files", "DAETut.dae")
+TOLERANCE = 0.001
+
+
+def welded_counts(dc, method):
+    """Vertex count after welding a fresh import, and whether all meshes are valid"""
+    bpy.ops.wm.read_homefile(use_empty=True)
+    bpy.ops.wm.collada_import(filepath=DAE_PATH)
+    objects = [o for o in bpy.context.scene.objects if o.type == "MESH"]
+    if method == "NUMPY":
+        dc.weld_vertices(objects, TOLERANCE)
+    else:
+        dc.remove_doubles(objects, TOLERANCE)
+
+    meshes = set(o.data for o in objects)
+    # validate returns True when it had to fix something
+    valid = not any(m.validate(verbose=True) for m in meshes)
+    return sum(len(m.vertices) for m in meshes), valid
+
+
+def main():
+    bpy.ops.wm.read_homefile(use_empty=True)
+    dc = dae_batch.load_addon()
+
+    bmesh_verts, _valid = welded_counts(dc, "BMESH")
+    numpy_verts, numpy_valid = welded_counts(dc, "NUMPY")
+    print("bmesh %s verts, numpy %s verts" % (bmesh_verts, numpy_verts))
+
+    failed = False
+    if bmesh_verts != numpy_verts:
+        print("FAIL: vertex counts differ")
+        failed = True
+    if not numpy_valid:
+        print("FAIL: NumPy weld left invalid geometry")
+        failed = True
+    if not failed:
+        print("OK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()